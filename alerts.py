@@ -0,0 +1,210 @@
+# 🔔 Alert Debouncing
+# Stop alerts from flapping on and off with every frame!
+#
+#   alerts = AlertManager(window=10, statistic="p90", on_event=print)
+#   alerts.update("lobby", detections, zone_counts)   # every frame
+#
+# A single frame with 11 people no longer means "Evacuate!". Each camera
+# keeps the counts of the last N seconds in a ring buffer and the rules
+# are applied to their mean (or a percentile). On top of that:
+#
+# - going UP a level happens as soon as the smoothed count gets there
+# - going DOWN needs the count to drop exit_margin below the rule's
+#   threshold AND the current level to have lasted min_hold seconds
+# - escalating again to a level that was announced less than cooldown
+#   seconds ago happens silently; stepping down is always announced, so
+#   nobody is left showing "Evacuate" after the crowd is gone
+#
+# An event is only emitted on a transition, so notifications happen once
+# per change instead of once per frame. Its "from" is the level that was
+# last announced.
+#
+# Severity follows rules.json order: earlier rules are more severe and the
+# default decision is the calmest level.
+
+import threading
+import time
+
+import numpy as np
+
+import metrics
+from rules import load_rules
+
+# Counts above this are treated as this (bounds the percentile histogram)
+MAX_COUNT = 255
+
+
+# ============================================================
+# 🔄 SLIDING WINDOW
+# ============================================================
+class SlidingWindow:
+    """Count vectors from the last `seconds`, in a fixed-size ring buffer.
+
+    Push, mean and percentile are O(1) per frame: a running sum gives the
+    mean, and a per-channel histogram of counts (0..MAX_COUNT) gives
+    percentiles without sorting.
+    """
+
+    def __init__(self, channels, seconds=10.0, capacity=1024):
+        self.seconds = seconds
+        self.capacity = capacity
+        self._times = np.zeros(capacity)
+        self._values = np.zeros((capacity, channels), dtype=np.int64)
+        self._sum = np.zeros(channels, dtype=np.int64)
+        self._hist = np.zeros((channels, MAX_COUNT + 1), dtype=np.int64)
+        self._rows = np.arange(channels)
+        self._start = 0  # oldest entry
+        self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    def _pop(self):
+        old = self._values[self._start]
+        self._sum -= old
+        self._hist[self._rows, old] -= 1
+        self._start = (self._start + 1) % self.capacity
+        self._size -= 1
+
+    def push(self, now, vec):
+        """Add one frame's counts and forget frames older than the window."""
+        while self._size and now - self._times[self._start] > self.seconds:
+            self._pop()
+        if self._size == self.capacity:
+            self._pop()
+        values = np.clip(np.asarray(vec, dtype=np.int64), 0, MAX_COUNT)
+        end = (self._start + self._size) % self.capacity
+        self._times[end] = now
+        self._values[end] = values
+        self._sum += values
+        self._hist[self._rows, values] += 1
+        self._size += 1
+
+    def mean(self):
+        return self._sum / max(self._size, 1)
+
+    def percentile(self, q):
+        """Per-channel count at percentile q (0..100), nearest rank."""
+        rank = max(1, int(np.ceil(self._size * q / 100)))
+        return (np.cumsum(self._hist, axis=1) >= rank).argmax(axis=1).astype(float)
+
+
+# ============================================================
+# 🚦 ONE CAMERA'S ALERT STATE
+# ============================================================
+class AlertState:
+    """Debounced alert level for one camera."""
+
+    def __init__(self, engine=None, window=10.0, statistic="mean", exit_margin=1,
+                 min_hold=5.0, cooldown=30.0, capacity=1024):
+        self.engine = engine or load_rules()
+        self.statistic = statistic
+        self.exit_margin = exit_margin
+        self.min_hold = min_hold
+        self.cooldown = cooldown
+        self.window = SlidingWindow(len(self.engine.channels), window, capacity)
+
+        self.calmest = len(self.engine.rules)  # the default decision
+        self.level = self.calmest
+        self.since = None
+        self.value = None
+        self.announced = self.calmest  # the level consumers were last told
+        self._announced = {}  # level -> last time an event was emitted
+        if statistic != "mean" and not statistic.startswith("p"):
+            raise ValueError(f"statistic must be 'mean' or 'pNN', got {statistic!r}")
+        self._q = None if statistic == "mean" else float(statistic[1:])
+
+    @property
+    def decision(self):
+        return self._decision(self.level)
+
+    def _decision(self, level):
+        if level == self.calmest:
+            return dict(self.engine.default_decision)
+        return dict(self.engine.decisions[level])
+
+    def _smoothed(self):
+        return self.window.mean() if self._q is None else self.window.percentile(self._q)
+
+    def _match(self, vec):
+        index = int(self.engine.match_many(vec)[0])
+        return self.calmest if index < 0 else index
+
+    def update(self, vec, now=None):
+        """Add one frame's count vector; returns an event dict on a transition."""
+        now = time.monotonic() if now is None else now
+        if self.since is None:
+            self.since = now
+        self.window.push(now, vec)
+        self.value = self._smoothed()
+
+        target = self._match(self.value)
+        if target == self.level:
+            return None
+        if target > self.level:  # calmer
+            if now - self.since < self.min_hold:
+                return None
+            # Counts must be clearly below the threshold, not hovering on it
+            target = self._match(self.value + self.exit_margin)
+            if target <= self.level:
+                return None
+
+        self.level, self.since = target, now
+        metrics.inc("alert_transitions")
+        if target == self.announced:
+            return None  # back to what consumers already show
+
+        escalation = target < self.announced
+        last = self._announced.get(target)
+        if escalation and last is not None and now - last < self.cooldown:
+            metrics.inc("alerts_suppressed")
+            return None
+        previous = self._decision(self.announced)
+        self.announced = target
+        self._announced[target] = now
+        return {
+            "from": previous,
+            "to": self.decision,
+            "escalation": escalation,
+            "value": {
+                name if zone is None else f"{zone}:{name}": round(float(v), 2)
+                for (zone, name), v in zip(self.engine.channels, self.value)
+            },
+            "time": now,
+        }
+
+
+# ============================================================
+# 📹 ALL CAMERAS
+# ============================================================
+class AlertManager:
+    """One AlertState per camera; calls on_event(camera, event) on transitions."""
+
+    def __init__(self, on_event=None, engine=None, **settings):
+        self.on_event = on_event
+        self.engine = engine or load_rules()
+        self.settings = settings
+        self.states = {}
+        self._lock = threading.Lock()
+
+    def state(self, camera):
+        with self._lock:
+            state = self.states.get(camera)
+            if state is None:
+                state = AlertState(self.engine, **self.settings)
+                self.states[camera] = state
+            return state
+
+    def update(self, camera, detections, zone_counts=None, now=None):
+        """Feed one frame; returns the event (or None) and calls on_event."""
+        vec = self.engine.vector_from_detections(detections, zone_counts)
+        event = self.state(camera).update(vec, now)
+        if event is not None:
+            event["camera"] = camera
+            if self.on_event:
+                self.on_event(camera, event)
+        return event
+
+    def decision(self, camera):
+        """The debounced decision for a camera."""
+        return self.state(camera).decision
@@ -0,0 +1,386 @@
+# 🌐 Detection API Server
+# Let cameras and other systems send snapshots over HTTP - no browser needed!
+#
+# Usage:
+#   python api_server.py --port 8000
+#   python api_server.py --port 8000 --workers 4     (one process per core)
+#
+#   curl --data-binary @sample.jpg http://localhost:8000/detect
+#   curl --data-binary @sample.jpg http://localhost:8000/analyze
+#   curl --data-binary @sample.jpg http://localhost:8000/annotate -o boxes.jpg
+#
+#   python api_server.py --camera lobby=rtsp://camera/stream
+#   open http://localhost:8000/stream/lobby in a browser (live MJPEG with boxes)
+#
+# Requests that arrive at the same time are grouped into one batch before
+# calling the model, so the model stays busy instead of running one tiny
+# image at a time.
+
+import argparse
+import asyncio
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+import numpy as np
+from aiohttp import web
+
+import metrics
+from detections import Detections
+from model_registry import get_model
+from renderer import MJPEG_CONTENT_TYPE, Renderer, mjpeg_part
+from rules import load_rules
+from tuning import tuned_batch_size
+
+
+# ============================================================
+# 📦 MICRO-BATCHER
+# ============================================================
+class MicroBatcher:
+    """Collects images from concurrent requests into batches.
+
+    A batch is sent to the model when it has max_batch images, or when the
+    oldest image has waited max_wait_ms - whichever comes first.
+    """
+
+    def __init__(self, model, max_batch=8, max_wait_ms=10):
+        self.model = model
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        self._queue = asyncio.Queue()
+        # The model runs in one thread so the event loop keeps taking requests
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="model")
+        self._task = None
+
+    def start(self):
+        self._task = asyncio.ensure_future(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+        self._executor.shutdown(wait=False)
+
+    async def detect(self, image):
+        """Queue one image and wait for its result."""
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((image, future))
+        return await future
+
+    async def _next_batch(self):
+        batch = [await self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._next_batch()
+            images = [image for image, _ in batch]
+            metrics.inc("batches")
+            metrics.inc("batched_images", len(images))
+            try:
+                results = await loop.run_in_executor(
+                    self._executor, lambda: self.model(images, verbose=False)
+                )
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            for (_, future), result in zip(batch, results):
+                metrics.record_model_speed(result)
+                if not future.done():
+                    future.set_result(result)
+
+
+# ============================================================
+# 📺 ANNOTATED IMAGES + MJPEG CAMERA FEEDS
+# ============================================================
+def _annotated_jpeg(renderer, image, result, quality=80):
+    """Boxes drawn straight onto image, encoded as JPEG bytes."""
+    renderer.draw(image, Detections.from_result(result), in_place=True)
+    return renderer.encode_jpeg(image, quality)
+
+
+# One Renderer per decoder thread, so its label images and output buffer
+# are reused across requests (a Renderer isn't safe to share between threads)
+_local = threading.local()
+
+
+def _annotate_here(image, result):
+    renderer = getattr(_local, "renderer", None)
+    if renderer is None:
+        renderer = _local.renderer = Renderer()
+    return _annotated_jpeg(renderer, image, result)
+
+
+class CameraFeed:
+    """Annotated JPEG frames of one camera, shared by all its viewers.
+
+    The camera is only read while someone watches, and its frames go
+    through the same micro-batcher as the HTTP requests.
+    """
+
+    def __init__(self, source, batcher, quality=80):
+        self.source = source
+        self.batcher = batcher
+        self.quality = quality
+        self.viewers = 0
+        self.live = False
+        self.jpeg = None
+        self._frame_id = 0
+        self._changed = asyncio.Condition()
+        self._renderer = Renderer()
+        # Reading, drawing and encoding happen off the event loop, in order
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="camera")
+
+    def join(self):
+        self.viewers += 1
+        if not self.live:
+            self.live = True
+            self.jpeg, self._frame_id = None, 0  # no stale frame from the last run
+            asyncio.ensure_future(self._run())
+
+    def leave(self):
+        self.viewers -= 1
+
+    async def next_frame(self, last_id=0):
+        """(frame id, JPEG) newer than last_id, or (None, None) once the feed stops."""
+        async with self._changed:
+            await self._changed.wait_for(lambda: self._frame_id != last_id or not self.live)
+        if not self.live:
+            return None, None
+        return self._frame_id, self.jpeg
+
+    def _annotate(self, frame, result):
+        return _annotated_jpeg(self._renderer, frame, result, self.quality)
+
+    async def _run(self):
+        from stream_monitor import open_source
+
+        loop = asyncio.get_running_loop()
+        cap = None
+        try:
+            cap = await loop.run_in_executor(self._executor, open_source, self.source)
+            while self.viewers > 0:
+                ok, frame = await loop.run_in_executor(self._executor, cap.read)
+                if not ok:
+                    break
+                result = await self.batcher.detect(frame)
+                metrics.inc("frames_processed")
+                jpeg = await loop.run_in_executor(self._executor, self._annotate, frame, result)
+                async with self._changed:
+                    self.jpeg, self._frame_id = jpeg, self._frame_id + 1
+                    self._changed.notify_all()
+        except Exception as e:
+            print(f"⚠️  Camera {self.source}: {e}")
+        finally:
+            if cap is not None:
+                cap.release()
+            async with self._changed:
+                self.live = False
+                self._changed.notify_all()
+
+
+# ============================================================
+# 🔍 REQUEST HANDLERS
+# ============================================================
+async def _read_image(request):
+    """Image bytes from a raw body or a multipart "image" field."""
+    if request.content_type.startswith("multipart/"):
+        form = await request.post()
+        field = form.get("image")
+        if field is None:
+            raise web.HTTPBadRequest(text="multipart body needs an 'image' field")
+        data = field.file.read()
+    else:
+        data = await request.read()
+
+    if not data:
+        raise web.HTTPBadRequest(text="empty request body")
+    # Decoding a 4K JPEG takes tens of ms - do it off the event loop (OpenCV
+    # releases the GIL) so other requests and the batcher keep running
+    image = await asyncio.get_running_loop().run_in_executor(
+        request.app["decoder"], _decode, data
+    )
+    if image is None:
+        raise web.HTTPBadRequest(text="could not decode image")
+    return image
+
+
+def _decode(data):
+    # Full size: the boxes in the response are in the client's pixels
+    with metrics.stage("decode"):
+        return cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
+
+
+async def _detect(request):
+    image = await _read_image(request)
+    result = await request.app["batcher"].detect(image)
+    metrics.inc("frames_processed")
+    with metrics.stage("extract"):
+        detections = Detections.from_result(result)
+    return detections, {
+        "detections": detections.to_list(),
+        "total_objects": len(detections),
+        "person_count": detections.count("person"),
+        "counts": detections.histogram(),
+    }
+
+
+async def handle_detect(request):
+    _, body = await _detect(request)
+    return web.json_response(body)
+
+
+async def handle_analyze(request):
+    detections, body = await _detect(request)
+    with metrics.stage("rules"):
+        body["decision"] = load_rules().decide_detections(detections)
+    return web.json_response(body)
+
+
+async def handle_annotate(request):
+    """The image back as a JPEG with the detection boxes drawn on it."""
+    image = await _read_image(request)
+    result = await request.app["batcher"].detect(image)
+    metrics.inc("frames_processed")
+    jpeg = await asyncio.get_running_loop().run_in_executor(
+        request.app["decoder"], _annotate_here, image, result
+    )
+    return web.Response(body=jpeg, content_type="image/jpeg")
+
+
+async def handle_stream(request):
+    """Live MJPEG stream of a camera given with --camera NAME=SOURCE."""
+    feed = request.app["feeds"].get(request.match_info["camera"])
+    if feed is None:
+        raise web.HTTPNotFound(text=f"unknown camera, try one of {sorted(request.app['feeds'])}")
+    response = web.StreamResponse(headers={"Content-Type": MJPEG_CONTENT_TYPE,
+                                           "Cache-Control": "no-cache"})
+    await response.prepare(request)
+    feed.join()
+    try:
+        frame_id = 0
+        while True:
+            frame_id, jpeg = await feed.next_frame(frame_id)
+            if jpeg is None:
+                break
+            await response.write(mjpeg_part(jpeg))
+    except ConnectionResetError:
+        pass  # the viewer went away
+    finally:
+        feed.leave()
+    return response
+
+
+async def handle_health(request):
+    return web.json_response({"status": "ok", "pid": os.getpid()})
+
+
+async def handle_metrics(request):
+    return web.Response(text=metrics.REGISTRY.render(), content_type="text/plain")
+
+
+# ============================================================
+# 🚀 APP SETUP
+# ============================================================
+def create_app(model=None, max_batch=8, max_wait_ms=10, cameras=None):
+    """cameras: {name: video source} served as MJPEG at /stream/{name}."""
+    app = web.Application(client_max_size=32 * 1024 * 1024)
+    app.router.add_post("/detect", handle_detect)
+    app.router.add_post("/analyze", handle_analyze)
+    app.router.add_post("/annotate", handle_annotate)
+    app.router.add_get("/stream/{camera}", handle_stream)
+    app.router.add_get("/health", handle_health)
+    app.router.add_get("/metrics", handle_metrics)
+
+    async def on_startup(app):
+        batcher = MicroBatcher(model or get_model(), max_batch, max_wait_ms)
+        batcher.start()
+        app["batcher"] = batcher
+        app["decoder"] = ThreadPoolExecutor(max_workers=min(4, os.cpu_count() or 1),
+                                            thread_name_prefix="decode")
+        app["feeds"] = {name: CameraFeed(source, batcher)
+                        for name, source in (cameras or {}).items()}
+
+    async def on_cleanup(app):
+        await app["batcher"].stop()
+        app["decoder"].shutdown(wait=False)
+
+    app.on_startup.append(on_startup)
+    app.on_cleanup.append(on_cleanup)
+    return app
+
+
+def serve(host="127.0.0.1", port=8000, max_batch=8, max_wait_ms=10, reuse_port=False,
+          cameras=None):
+    web.run_app(
+        create_app(max_batch=max_batch, max_wait_ms=max_wait_ms, cameras=cameras),
+        host=host, port=port, reuse_port=reuse_port, print=None,
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the detection HTTP API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--max-batch", type=int, default=tuned_batch_size(8),
+                        help="images per model call (default: from optimize.py profile)")
+    parser.add_argument("--max-wait-ms", type=float, default=10)
+    parser.add_argument("--workers", type=int, default=1,
+                        help="server processes sharing the port (each loads its own model)")
+    parser.add_argument("--camera", action="append", default=[], metavar="NAME=SOURCE",
+                        help="serve a live annotated MJPEG stream at /stream/NAME (repeatable)")
+    args = parser.parse_args(argv)
+    cameras = {}
+    for spec in args.camera:
+        name, sep, source = spec.partition("=")
+        if not sep or not name or not source:
+            parser.error(f"--camera needs NAME=SOURCE, got {spec!r}")
+        cameras[name] = source
+
+    print("=" * 50)
+    print(f"🌐 Detection API on http://{args.host}:{args.port}")
+    print(f"   batch ≤ {args.max_batch} images, wait ≤ {args.max_wait_ms} ms, "
+          f"{args.workers} worker(s)")
+    print("=" * 50)
+
+    for name, source in cameras.items():
+        print(f"📺 /stream/{name} <- {source}")
+
+    options = dict(host=args.host, port=args.port, max_batch=args.max_batch,
+                   max_wait_ms=args.max_wait_ms, cameras=cameras)
+    if args.workers <= 1:
+        serve(**options)
+        return
+
+    # Every process binds the same port (SO_REUSEPORT) and the kernel
+    # spreads incoming connections between them.
+    processes = [
+        multiprocessing.Process(target=serve, kwargs=dict(options, reuse_port=True))
+        for _ in range(args.workers)
+    ]
+    for process in processes:
+        process.start()
+    try:
+        for process in processes:
+            process.join()
+    except KeyboardInterrupt:
+        for process in processes:
+            process.terminate()
+
+
+if __name__ == "__main__":
+    main()
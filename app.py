@@ -4,13 +4,21 @@ A complete project using Computer Vision, Agentic AI, and Generative AI!
 """
 
 import streamlit as st
-from ultralytics import YOLO
-import cv2
-import google.generativeai as genai
-from PIL import Image
-import numpy as np
 import os
 
+import metrics
+from detection_cache import exact_key, get_detection_cache
+from detections import Detections
+from event_store import get_event_store
+from image_io import MODEL_SIZE, decode_image
+from model_registry import get_model, model_identity
+from process_pool import get_pool
+from renderer import Renderer
+from report_service import ReportError, ReportService, gemini_provider
+from rules import load_rules
+from tiling import TiledDetector, tiling_enabled
+from zones import load_zones, shift_boxes
+
 # ============================================================
 # 🎨 PAGE SETUP
 # ============================================================
@@ -24,6 +32,32 @@ st.title("🚨 AI Security Monitor")
 st.write("Upload a photo and watch AI analyze it!")
 st.write("---")
 
+# Load (and warm up) the shared model once per process.
+# Reruns and other sessions reuse it from the registry.
+with st.spinner("📥 Loading AI model..."):
+    model = get_model()
+
+# Serve /metrics if MONITOR_METRICS_PORT is set (starts once per process)
+metrics.start_server_from_env()
+
+
+@st.cache_resource(max_entries=32)
+def get_report_service(api_key):
+    """One report service per API key, so circuit breakers remember failures.
+
+    Keyed by the key so one session's bad key can't open the breakers
+    every other session relies on.
+    """
+    # Try different models in order (later ones start if earlier ones are slow)
+    models_to_try = [
+        "gemini-2.0-flash",
+        "gemini-1.5-flash",
+        "gemini-1.5-pro",
+        "gemini-pro",
+    ]
+    return ReportService([gemini_provider(name) for name in models_to_try])
+
+
 # ============================================================
 # ⚙️ SETUP SECTION
 # ============================================================
@@ -61,43 +95,75 @@ if uploaded_file is not None:
     # Display uploaded image
     # ========================================================
     st.subheader("Your Uploaded Image")
-    image = Image.open(uploaded_file)
-    st.image(image, use_column_width=True)
-    
-    # Convert to OpenCV format
-    image_cv = cv2.cvtColor(np.array(image), cv2.COLOR_RGB2BGR)
+    # Decode ONCE, straight from the upload bytes into OpenCV's BGR format,
+    # already shrunk close to the model's input size. Zones are drawn in
+    # full-size pixels, and tiled detection needs the detail, so keep the
+    # full size when either is used.
+    zones = load_zones()
+    tiled = tiling_enabled()
+    with metrics.stage("decode"):
+        image_cv = decode_image(uploaded_file.getbuffer(),
+                                target=None if zones or tiled else MODEL_SIZE)
+    st.image(image_cv, channels="BGR", use_column_width=True)
     
     # ========================================================
     # 🔍 STEP 2: OBJECT DETECTION
     # ========================================================
     st.header("🔍 Step 2: Detecting Objects (Computer Vision)")
     
-    progress_bar = st.progress(0)
-    status_text = st.empty()
-    
-    status_text.text("📥 Loading AI model...")
-    progress_bar.progress(25)
-    
-    model = YOLO("yolov8n.pt")
-    
-    status_text.text("🔍 Analyzing image...")
-    progress_bar.progress(50)
+    # The same photo uploaded again (decoded at the same size) is answered
+    # from the detection cache without running the model - almost identical
+    # ones too with MONITOR_NEAR_DUPLICATES=1.
+    detection_cache = get_detection_cache()
+    # Results from another model, pass or zone crop must not be reused
+    cache_context = model_identity() + ("|tiled" if tiled else "")
+    if zones and not tiled:
+        cache_context += f"|zones{zones.union_box(image_cv.shape, 64)}"
+    with metrics.stage("detection_cache"):
+        detections = detection_cache.get(
+            data=uploaded_file.getbuffer(), image=image_cv, context=cache_context
+        )
+    cached = detections is not None
     
-    results = model(image_cv)
-    
-    status_text.text("✅ Detection complete!")
-    progress_bar.progress(100)
+    # With MONITOR_WORKERS set, inference runs in the shared process pool.
+    # With MONITOR_TILING set, zoomed-in tiles are checked too (small people).
+    # With zones, only their area is checked - like make_decision.py does.
+    pool = None if tiled else get_pool()
+    results = None
+    if not cached:
+        with st.spinner("🔍 Analyzing image..."):
+            if tiled:
+                with metrics.stage("inference"):
+                    detections = TiledDetector().detect(model, image_cv, zones)
+            elif pool is not None:
+                frame, offset = zones.crop(image_cv) if zones else (image_cv, (0, 0))
+                with metrics.stage("inference"):
+                    detections = pool.submit(frame).result(timeout=pool.timeout)
+                detections = shift_boxes(detections, offset)
+            elif zones:
+                result, detections = zones.detect(model, image_cv)
+                results = [result]
+            else:
+                results = model(image_cv)
+                # Get all detections (one pass over the boxes)
+                with metrics.stage("extract"):
+                    detections = Detections.from_result(results[0])
+        detection_cache.put(
+            detections, data=uploaded_file.getbuffer(), image=image_cv, context=cache_context
+        )
     
-    # Get all detections
-    all_detections = []
-    for detection in results[0].boxes:
-        class_id = int(detection.cls)
-        class_name = results[0].names[class_id]
-        confidence = float(detection.conf)
-        all_detections.append({
-            "object": class_name.upper(),
-            "confidence": f"{confidence*100:.1f}%"
-        })
+    if results is not None:
+        metrics.record_model_speed(results[0])
+        speed = results[0].speed
+        st.caption(
+            f"✅ Detection complete! ⏱️ preprocess {speed['preprocess']:.1f} ms · "
+            f"inference {speed['inference']:.1f} ms · postprocess {speed['postprocess']:.1f} ms"
+        )
+    elif cached:
+        st.caption("♻️ Seen this photo before - reused its detections!")
+    else:
+        st.caption("✅ Detection complete!")
+    all_detections = detections.to_list()
     
     # Display detections
     col1, col2 = st.columns(2)
@@ -115,12 +181,7 @@ if uploaded_file is not None:
     # ========================================================
     st.header("👥 Step 3: Counting People (Agentic AI)")
     
-    person_count = 0
-    for detection in results[0].boxes:
-        class_id = int(detection.cls)
-        class_name = results[0].names[class_id]
-        if class_name == "person":
-            person_count += 1
+    person_count = detections.count("person")
     
     st.metric("People Detected", person_count)
     
@@ -129,26 +190,27 @@ if uploaded_file is not None:
     # ========================================================
     st.header("🤖 Step 4: Making Decision (Agentic AI)")
     
-    if person_count > 10:
-        status = "🚨 VERY CROWDED"
-        alert_level = "CRITICAL"
-        color = "red"
-        action = "Evacuate area immediately!"
-    elif person_count > 5:
-        status = "⚠️  CROWDED"
-        alert_level = "HIGH"
-        color = "orange"
-        action = "Monitor area carefully"
-    elif person_count > 2:
-        status = "✅ NORMAL"
-        alert_level = "LOW"
-        color = "green"
-        action = "Everything is fine"
-    else:
-        status = "📭 EMPTY"
-        alert_level = "NONE"
-        color = "blue"
-        action = "Area is clear"
+    # Per-zone counts (only if zones.json is set up for this camera)
+    zone_counts = zones.zone_counts(detections, image_cv.shape) if zones else {}
+    if zone_counts:
+        zone_cols = st.columns(len(zone_counts))
+        for zone_col, (zone_name, counts) in zip(zone_cols, zone_counts.items()):
+            zone_col.metric(f"🗺️ {zone_name}", counts.get("person", 0))
+    
+    with metrics.stage("rules"):
+        decision = load_rules().decide_detections(detections, zone_counts)
+    status = decision["status"]
+    alert_level = decision["alert_level"]
+    color = decision["color"]
+    action = decision["action"]
+    
+    # Keep a history of every analysis (if MONITOR_EVENTS is set). Streamlit
+    # reruns the script on every widget change, so log each upload only once.
+    event_store = get_event_store()
+    upload_key = exact_key(data=uploaded_file.getbuffer())
+    if event_store is not None and st.session_state.get("logged_upload") != upload_key:
+        event_store.append_detections("upload", detections, decision, zone_counts=zone_counts)
+        st.session_state.logged_upload = upload_key
     
     col1, col2, col3 = st.columns(3)
     with col1:
@@ -161,62 +223,27 @@ if uploaded_file is not None:
     # ========================================================
     # 📝 STEP 5: GENERATE REPORT
     # ========================================================
+    # The report is filled in at the very end, so detection results
+    # show up right away instead of waiting for the LLM.
     st.header("📝 Step 5: Generating Report (Generative AI)")
-    
+    report_area = st.empty()
     if api_key:
-        genai.configure(api_key=api_key)
-        
-        prompt = f"""
-        You are a friendly security report writer.
-        
-        INFORMATION:
-        - People detected: {person_count}
-        - Status: {status}
-        - Alert Level: {alert_level}
-        - Recommended Action: {action}
-        
-        TASK: Write a SHORT, friendly report (exactly 3 sentences) 
-        about this situation. Write like you're talking to a 10-year-old.
-        Make it helpful and clear!
-        """
-        
-        try:
-            # Try different models in order
-            models_to_try = [
-                "gemini-2.0-flash",
-                "gemini-1.5-flash",
-                "gemini-1.5-pro",
-                "gemini-pro",
-            ]
-            
-            report = None
-            for model_name in models_to_try:
-                try:
-                    model_gemini = genai.GenerativeModel(model_name)
-                    response = model_gemini.generate_content(prompt)
-                    report = response.text
-                    break
-                except:
-                    continue
-            
-            if report:
-                st.success("✅ Report Generated!")
-                st.info(report)
-            else:
-                st.warning("⚠️ Could not generate report. Try uploading a different image.")
-            
-        except Exception as e:
-            st.error(f"❌ Error generating report: {e}")
-            st.info("Try updating: pip install --upgrade google-generativeai")
+        report_area.info("⏳ Writing report...")
     
     # ========================================================
     # 🎨 SHOW ANNOTATED IMAGE
     # ========================================================
     st.header("🎨 Annotated Image (with Detection Boxes)")
     
-    annotated_image = results[0].plot()
-    annotated_pil = Image.fromarray(cv2.cvtColor(annotated_image, cv2.COLOR_BGR2RGB))
-    st.image(annotated_pil, use_column_width=True, caption="AI detected these boxes")
+    # One renderer per browser session: label images are drawn once and
+    # the output buffer is reused on every rerun
+    if "renderer" not in st.session_state:
+        st.session_state.renderer = Renderer()
+    with metrics.stage("annotation"):
+        annotated_image = st.session_state.renderer.draw(image_cv, detections)
+        # A JPEG is much smaller to send to the browser than raw pixels
+        annotated_jpeg = st.session_state.renderer.encode_jpeg(annotated_image)
+    st.image(annotated_jpeg, use_column_width=True, caption="AI detected these boxes")
     
     # ========================================================
     # 📊 SUMMARY
@@ -232,6 +259,53 @@ if uploaded_file is not None:
     - 📋 Action: {action}
     """
     st.success(summary)
+    
+    # ========================================================
+    # 📝 STEP 5 (continued): FILL IN THE REPORT
+    # ========================================================
+    if api_key:
+        # The Gemini SDK is only loaded once a report is actually needed
+        import google.generativeai as genai
+        genai.configure(api_key=api_key)
+        
+        prompt = f"""
+        You are a friendly security report writer.
+        
+        INFORMATION:
+        - People detected: {person_count}
+        - Status: {status}
+        - Alert Level: {alert_level}
+        - Recommended Action: {action}
+        
+        TASK: Write a SHORT, friendly report (exactly 3 sentences) 
+        about this situation. Write like you're talking to a 10-year-old.
+        Make it helpful and clear!
+        """
+        
+        # Same situation as before? The service reuses the cached report.
+        report_inputs = {
+            "person_count": person_count,
+            "status": status,
+            "alert_level": alert_level,
+            "action": action,
+        }
+        
+        try:
+            # Words show up as the model writes them, not all at the end
+            stream = get_report_service(api_key).stream(prompt, report_inputs)
+            for _ in stream:
+                report_area.info(stream.text + "▌")
+            with report_area.container():
+                st.success(f"✅ Report Generated! ({stream.model})")
+                st.info(stream.text)
+        except ReportError as e:
+            with report_area.container():
+                st.warning("⚠️ Could not generate report. Try uploading a different image.")
+                st.caption(str(e))
+        except Exception as e:
+            with report_area.container():
+                st.error(f"❌ Error generating report: {e}")
+                st.info("Try updating: pip install --upgrade google-generativeai")
 
 else:
     st.info("👆 Upload an image to get started!")
\ No newline at end of file
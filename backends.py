@@ -0,0 +1,194 @@
+# ⚙️ Inference Backends
+# Run the same YOLO model through PyTorch, ONNX Runtime or OpenVINO.
+#
+# Ultralytics can load an exported .onnx file or OpenVINO folder with
+# YOLO(path) and keeps the same pre-processing, NMS and class names, so
+# every entry point keeps calling model(image) exactly like before.
+
+import functools
+import glob
+import importlib.util
+import os
+
+import numpy as np
+
+BACKENDS = ("torch", "onnx", "openvino")
+
+# Fastest first on CPU-only machines
+CPU_PREFERENCE = ("openvino", "onnx", "torch")
+
+# Set MONITOR_BACKEND=torch|onnx|openvino to override automatic selection
+BACKEND_ENV = "MONITOR_BACKEND"
+
+
+def _installed(module):
+    return importlib.util.find_spec(module) is not None
+
+
+def available_backends():
+    """Backends whose runtime is installed on this machine."""
+    found = ["torch"]
+    if _installed("onnxruntime"):
+        found.append("onnx")
+    if _installed("openvino"):
+        found.append("openvino")
+    return found
+
+
+@functools.lru_cache(maxsize=None)
+def gpu_available():
+    """True if PyTorch can see a CUDA or Apple GPU (checked once)."""
+    try:
+        import torch
+    except ImportError:
+        return False
+    mps = getattr(torch.backends, "mps", None)
+    return torch.cuda.is_available() or bool(mps and mps.is_available())
+
+
+def select_backend(device=None):
+    """Pick the fastest backend that is installed.
+
+    GPUs stay on PyTorch - an explicit GPU device or, with device=None, a
+    GPU PyTorch can see. The ONNX/OpenVINO paths here are CPU paths.
+    """
+    requested = os.getenv(BACKEND_ENV)
+    if requested:
+        if requested not in BACKENDS:
+            raise ValueError(f"{BACKEND_ENV} must be one of {BACKENDS}, got {requested!r}")
+        return requested
+
+    if device is not None and str(device) != "cpu":
+        return "torch"
+
+    available = available_backends()
+    if available == ["torch"]:
+        return "torch"
+    if device is None and gpu_available():
+        return "torch"
+    for backend in CPU_PREFERENCE:
+        if backend in available:
+            return backend
+    return "torch"
+
+
+def exported_path(weights, backend):
+    """Where Ultralytics writes the exported model for a weights file."""
+    stem, _ = os.path.splitext(weights)
+    if backend == "onnx":
+        return stem + ".onnx"
+    if backend == "openvino":
+        return stem + "_openvino_model"
+    return weights
+
+
+def export_model(weights, backend, imgsz=640):
+    """Export weights to a backend format, reusing the file if it already exists."""
+    if backend == "torch":
+        return weights
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown backend {backend!r}, expected one of {BACKENDS}")
+
+    path = exported_path(weights, backend)
+    if os.path.exists(path):
+        # Re-export only if the weights are newer than the exported copy
+        if not os.path.exists(weights) or os.path.getmtime(path) >= os.path.getmtime(weights):
+            return path
+
+    from ultralytics import YOLO  # heavy (pulls in torch) - only when needed
+
+    print(f"📦 Exporting {weights} to {backend} (only happens once)...")
+    return YOLO(weights).export(format=backend, imgsz=imgsz)
+
+
+def _session_owner(model, attr):
+    """The object that really holds model.predictor.model.<attr>.
+
+    Newer Ultralytics releases keep the session on AutoBackend.backend and
+    only forward attribute reads to it, so assigning on AutoBackend would
+    just shadow it. Older releases keep it on AutoBackend itself.
+    """
+    runtime = getattr(getattr(model, "predictor", None), "model", None)
+    for owner in (getattr(runtime, "__dict__", {}).get("backend"), runtime):
+        if owner is not None and getattr(owner, "__dict__", {}).get(attr) is not None:
+            return owner
+    return None
+
+
+def _rebind_outputs(owner, session):
+    """Point a CUDA IO binding at the new session, reusing the output tensors."""
+    io = session.io_binding()
+    for output, tensor in zip(session.get_outputs(), owner.bindings):
+        io.bind_output(
+            name=output.name,
+            device_type=tensor.device.type,
+            device_id=tensor.device.index or 0,
+            element_type=np.float16 if str(tensor.dtype) == "torch.float16" else np.float32,
+            shape=tuple(tensor.shape),
+            buffer_ptr=tensor.data_ptr(),
+        )
+    owner.io = io
+
+
+def limit_threads(model, path, backend, intra_op=None, inter_op=None):
+    """Rebuild an ONNX Runtime / OpenVINO session with these thread counts.
+
+    Ultralytics creates those sessions with default options (one thread per
+    core), so torch.set_num_threads() never reaches them. OpenVINO only
+    takes intra_op. Returns True if a session was rebuilt and raises
+    RuntimeError if the session can't be found.
+    """
+    if backend == "torch" or not (intra_op or inter_op):
+        return False
+    if backend == "openvino" and not intra_op:
+        return False
+    # The session is only created on the first call (this doubles as warm-up)
+    model(np.zeros((64, 64, 3), dtype=np.uint8), verbose=False)
+
+    if backend == "onnx":
+        import onnxruntime
+
+        owner = _session_owner(model, "session")
+        if owner is None:
+            raise RuntimeError("Cannot find the ONNX Runtime session to limit its threads")
+        options = onnxruntime.SessionOptions()
+        if intra_op:
+            options.intra_op_num_threads = intra_op
+        if inter_op:
+            options.inter_op_num_threads = inter_op
+        session = onnxruntime.InferenceSession(
+            path, options, providers=owner.session.get_providers()
+        )
+        if getattr(owner, "io", None) is not None:
+            _rebind_outputs(owner, session)
+        owner.session = session
+        return True
+
+    import openvino
+
+    owner = _session_owner(model, "ov_compiled_model")
+    if owner is None:
+        raise RuntimeError("Cannot find the OpenVINO compiled model to limit its threads")
+    core = openvino.Core()
+    xml = path if path.endswith(".xml") else glob.glob(os.path.join(path, "*.xml"))[0]
+    owner.ov_compiled_model = core.compile_model(
+        core.read_model(xml), "CPU",
+        {"INFERENCE_NUM_THREADS": intra_op, "PERFORMANCE_HINT": "LATENCY"},
+    )
+    return True
+
+
+def load_model(weights, backend, device=None, threads=None):
+    """Load weights with the given backend, exporting first if needed.
+
+    threads: optional (intra_op, inter_op) for the ONNX/OpenVINO session.
+    """
+    from ultralytics import YOLO
+
+    path = export_model(weights, backend)
+    model = YOLO(path, task="detect")
+    if device is not None and backend == "torch":
+        model.to(device)
+    if threads:
+        limit_threads(model, path, backend, *threads)
+    return model
@@ -0,0 +1,237 @@
+# 🗂️ Batch Detection for Image Archives
+# Scan a whole folder of snapshots in one go!
+#
+# Usage:
+#   python batch_detection.py snapshots/ -o results.jsonl
+#   python batch_detection.py "archive/**/*.jpg" -o results.csv --batch-size 32
+
+import argparse
+import csv
+import glob
+import json
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+import numpy as np
+
+import metrics
+from detection_cache import HammingIndex, exact_key, get_detection_cache
+from detections import Detections
+from model_registry import get_model, model_identity
+from process_pool import InferencePool
+from rules import load_rules
+from tuning import tuned_batch_size
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp")
+FIELDS = ["image", "person_count", "total_objects", "status", "alert_level", "action"]
+
+
+# ============================================================
+# 📂 FIND IMAGES
+# ============================================================
+def find_images(pattern):
+    """Return image paths from a directory (searched recursively) or a glob."""
+    if os.path.isdir(pattern):
+        pattern = os.path.join(pattern, "**", "*")
+    paths = glob.glob(pattern, recursive=True)
+    return sorted(p for p in paths if p.lower().endswith(IMAGE_EXTENSIONS))
+
+
+# ============================================================
+# ⚡ DECODE + DETECT IN BATCHES
+# ============================================================
+def _read(path):
+    """(file bytes, BGR image or None). The bytes key the detection cache."""
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+    except OSError:
+        return None, None
+    with metrics.stage("decode"):
+        return data, cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
+
+
+def _decoded_batches(paths, batch_size, workers):
+    """Decode images in a thread pool and yield them in batches.
+
+    OpenCV releases the GIL while decoding, so threads really run in
+    parallel. Only a couple of batches are decoded ahead of the model.
+    """
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        pending = []
+        window = batch_size * 2
+        index = 0
+
+        while index < len(paths) or pending:
+            while index < len(paths) and len(pending) < window:
+                pending.append((paths[index], pool.submit(_read, paths[index])))
+                index += 1
+
+            batch, pending = pending[:batch_size], pending[batch_size:]
+            yield [(path, *future.result()) for path, future in batch]
+
+
+def _detect_batch(model, images):
+    results = model(images, verbose=False) if images else []
+    for result in results:
+        metrics.record_model_speed(result)
+        with metrics.stage("extract"):
+            yield Detections.from_result(result)
+
+
+def _check_cache(batch, cache, near=False, context=""):
+    """Cached detections by batch index, plus {index: earlier index} for
+    duplicates (or, with near, near-duplicates) inside the batch - they
+    only need one model run."""
+    known, same_as, seen, exact = {}, {}, HammingIndex(cache.max_distance), {}
+    for i, (_, data, image) in enumerate(batch):
+        if image is None:
+            continue
+        hit = cache.get(data=data, image=image, context=context, near=near)
+        if hit is not None:
+            known[i] = hit
+            continue
+        key = exact_key(data, image)
+        if key in exact:
+            same_as[i] = exact[key]
+            continue
+        exact[key] = i
+        if not near:
+            continue
+        fingerprint = cache.perceptual_hash(image)
+        first, _ = seen.nearest(fingerprint, accept=lambda j: batch[j][2].shape == image.shape)
+        if first is None:
+            seen.add(i, fingerprint)
+        else:
+            same_as[i] = first
+    return known, same_as
+
+
+def analyze_images(paths, model=None, batch_size=16, workers=None, pool=None, cache=None,
+                   near=False):
+    """Yield one result dict per image, in input order.
+
+    With an InferencePool (see process_pool.py) images are spread over its
+    worker processes instead of running on the in-process model. With a
+    DetectionCache, duplicate images skip the model - and near-duplicates
+    too with near=True (not for fixed-camera frames: people coming or going
+    barely change the hash).
+    """
+    if pool is None:
+        model = model or get_model()
+    # Cached detections are only valid for the model that produced them
+    context = model_identity()
+    engine = load_rules()
+    workers = workers or min(8, (os.cpu_count() or 1) + 2)
+
+    for batch in _decoded_batches(paths, batch_size, workers):
+        known, same_as = _check_cache(batch, cache, near, context) if cache is not None else ({}, {})
+        todo = [image for i, (_, _, image) in enumerate(batch)
+                if image is not None and i not in known and i not in same_as]
+        if pool is not None:
+            found = pool.map(todo)
+        else:
+            found = _detect_batch(model, todo)
+
+        for i, (path, data, image) in enumerate(batch):
+            if image is None:
+                yield {"image": path, "error": "could not read image"}
+                continue
+
+            if i in same_as:
+                detections = known[same_as[i]]
+            elif i in known:
+                detections = known[i]
+            else:
+                detections = next(found)
+                known[i] = detections
+                if cache is not None:
+                    cache.put(detections, data=data, image=image, context=context)
+            metrics.inc("frames_processed")
+            person_count = detections.count("person")
+
+            with metrics.stage("rules"):
+                decision = engine.decide_detections(detections)
+            yield {
+                "image": path,
+                "person_count": person_count,
+                "total_objects": len(detections),
+                "status": decision["status"],
+                "alert_level": decision["alert_level"],
+                "action": decision["action"],
+            }
+
+
+# ============================================================
+# 💾 WRITE RESULTS
+# ============================================================
+def write_results(rows, output=None, fmt=None):
+    """Stream result rows to a JSONL or CSV file (or stdout)."""
+    if fmt is None:
+        fmt = "csv" if output and output.lower().endswith(".csv") else "jsonl"
+
+    out = open(output, "w", newline="", encoding="utf-8") if output else sys.stdout
+    count = 0
+    try:
+        if fmt == "csv":
+            writer = csv.DictWriter(out, fieldnames=FIELDS + ["error"])
+            writer.writeheader()
+            for row in rows:
+                writer.writerow(row)
+                count += 1
+        else:
+            for row in rows:
+                out.write(json.dumps(row, ensure_ascii=False) + "\n")
+                count += 1
+    finally:
+        if output:
+            out.close()
+    return count
+
+
+# ============================================================
+# 🚀 COMMAND LINE
+# ============================================================
+def main():
+    parser = argparse.ArgumentParser(description="Analyze many images at once")
+    parser.add_argument("images", help="directory or glob pattern")
+    parser.add_argument("-o", "--output", help="output .jsonl or .csv file")
+    parser.add_argument("--format", choices=["jsonl", "csv"])
+    parser.add_argument("--batch-size", type=int, default=tuned_batch_size(16),
+                        help="images per model call (default: from optimize.py profile)")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="decode threads")
+    parser.add_argument("--processes", type=int, default=0,
+                        help="run inference in this many worker processes")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="run the model on duplicate images too")
+    parser.add_argument("--near", action="store_true",
+                        help="also reuse detections of near-identical images "
+                             "(not for fixed-camera frames)")
+    args = parser.parse_args()
+    metrics.start_server_from_env()
+
+    paths = find_images(args.images)
+    if not paths:
+        print(f"❌ Error: No images found for {args.images}", file=sys.stderr)
+        sys.exit(1)
+
+    print(f"📷 Found {len(paths)} images", file=sys.stderr)
+    pool = InferencePool(args.processes) if args.processes > 0 else None
+    cache = None if args.no_cache else get_detection_cache()
+    try:
+        rows = analyze_images(paths, batch_size=args.batch_size,
+                              workers=args.workers, pool=pool, cache=cache, near=args.near)
+        count = write_results(rows, args.output, args.format)
+    finally:
+        if pool is not None:
+            pool.close()
+    print(f"✅ Analyzed {count} images", file=sys.stderr)
+    if cache is not None:
+        print(f"♻️  Detection cache: {cache.stats()}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
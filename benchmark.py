@@ -0,0 +1,289 @@
+# ⏱️ Benchmark Suite
+# Measure how long every stage of the monitor takes!
+#
+# Usage:
+#   python benchmark.py                              run and print results
+#   python benchmark.py -o bench.json                save results
+#   python benchmark.py --baseline bench.json        compare with a saved run
+#   python benchmark.py --startup                    only time command startup
+#   python benchmark.py --tracker                    only time the people tracker
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+
+import cv2
+import numpy as np
+
+import model_registry
+from detections import Detections
+from renderer import Renderer
+from report_cache import ReportCache
+from report_service import Provider, ReportService
+from rules import load_rules
+from tracker import Tracker
+
+DEFAULT_IMAGE = "sample.jpg"
+
+
+# ============================================================
+# 📏 MEASURING
+# ============================================================
+def summarize(samples):
+    """p50/p95/p99/mean latency (ms) and throughput for a list of seconds."""
+    ms = np.asarray(samples) * 1000
+    mean = float(ms.mean())
+    return {
+        "n": len(ms),
+        "p50_ms": round(float(np.percentile(ms, 50)), 3),
+        "p95_ms": round(float(np.percentile(ms, 95)), 3),
+        "p99_ms": round(float(np.percentile(ms, 99)), 3),
+        "mean_ms": round(mean, 3),
+        "per_second": round(1000 / mean, 1) if mean > 0 else None,
+    }
+
+
+def time_it(func, repeat, warmup=2):
+    for _ in range(warmup):
+        func()
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+# ============================================================
+# 🖼️ TEST IMAGES
+# ============================================================
+def crowded_image(image, grid=3):
+    """Tile an image into a grid -> lots of small people, like a wide shot."""
+    h, w = image.shape[:2]
+    tiles = np.tile(image, (grid, grid, 1))
+    return cv2.resize(tiles, (w * 2, h * 2), interpolation=cv2.INTER_AREA)
+
+
+def test_images(path=DEFAULT_IMAGE):
+    image = cv2.imread(path)
+    if image is None:
+        raise FileNotFoundError(f"Cannot find {path}")
+    return {"sample": image, "crowded": crowded_image(image)}
+
+
+# ============================================================
+# 🏃 STAGES
+# ============================================================
+def bench_model_load(repeat):
+    def load():
+        model_registry.evict()
+        model_registry.get_model(warmup=False)
+    return summarize(time_it(load, repeat, warmup=1))
+
+
+def bench_image(model, image, repeat):
+    """All per-image stages for one test image."""
+    results = {}
+    speeds = {"preprocess": [], "inference": [], "postprocess": []}
+
+    def detect():
+        result = model(image, verbose=False)[0]
+        # Ultralytics times its own stages (in ms)
+        for stage in speeds:
+            speeds[stage].append(result.speed[stage] / 1000)
+        return result
+
+    results["detect_total"] = summarize(time_it(detect, repeat))
+    for stage, samples in speeds.items():
+        results[stage] = summarize(samples[-repeat:])
+
+    result = model(image, verbose=False)[0]
+    results["box_extraction"] = summarize(
+        time_it(lambda: Detections.from_result(result), repeat * 10)
+    )
+
+    engine = load_rules()
+    detections = Detections.from_result(result)
+    results["rule_evaluation"] = summarize(
+        time_it(lambda: engine.decide_detections(detections), repeat * 10)
+    )
+    results["annotation_plot"] = summarize(time_it(result.plot, repeat))
+    renderer = Renderer()
+    results["annotation"] = summarize(
+        time_it(lambda: renderer.draw(image, detections), repeat)
+    )
+    annotated = renderer.draw(image, detections).copy()
+    results["jpeg_encode"] = summarize(
+        time_it(lambda: renderer.encode_jpeg(annotated), repeat)
+    )
+    results["people"] = detections.count("person")
+    return results
+
+
+def bench_report(repeat):
+    """Report generation against a stub provider (no network, no cache hits)."""
+
+    async def stub(prompt):
+        await asyncio.sleep(0)
+        return "The area looks calm. A few people are walking around. All is well."
+
+    service = ReportService([Provider("stub", stub)], cache=ReportCache(max_size=0))
+    return summarize(time_it(lambda: service.generate_sync("prompt", {"n": 1}), repeat))
+
+
+def bench_tracker(repeat, sizes=(10, 100)):
+    """Tracker.update() per frame with N people walking through the scene."""
+    results = {}
+    rng = np.random.default_rng(0)
+    for n in sizes:
+        start = rng.uniform(0, 3000, (n, 2))
+        size = rng.uniform(30, 120, (n, 2))
+        velocity = rng.normal(0, 2, (n, 2))
+        frames = []
+        for i in range(repeat * 10 + 20):
+            corner = start + i * velocity + rng.normal(0, 1, (n, 2))
+            frames.append((np.concatenate([corner, corner + size], axis=1),
+                           rng.uniform(0.2, 0.99, n)))
+        tracker = Tracker()
+        for i, (boxes, scores) in enumerate(frames[:20]):  # tracks get confirmed
+            tracker.update(boxes, scores, now=i)
+        samples = []
+        for i, (boxes, scores) in enumerate(frames[20:], start=20):
+            begin = time.perf_counter()
+            tracker.update(boxes, scores, now=i)
+            samples.append(time.perf_counter() - begin)
+        results[f"tracks_{n}"] = summarize(samples)
+    return results
+
+
+# Commands whose startup time we track (each runs in a fresh interpreter)
+STARTUP_COMMANDS = {
+    "monitor_help": ["monitor.py", "--help"],
+    "monitor_decide_help": ["monitor.py", "decide", "--help"],
+    "import_model_registry": ["-c", "import model_registry"],
+    "import_ultralytics": ["-c", "import ultralytics"],
+}
+
+
+def bench_startup(repeat):
+    """Wall time to start each command in a new Python process."""
+    here = os.path.dirname(os.path.abspath(__file__))
+    results = {}
+    for name, args in STARTUP_COMMANDS.items():
+        command = [sys.executable] + args
+        if subprocess.run(command, capture_output=True, cwd=here).returncode != 0:
+            results[name] = "failed"
+            continue
+        results[name] = summarize(time_it(
+            lambda: subprocess.run(command, capture_output=True, cwd=here, check=True),
+            repeat, warmup=1,
+        ))
+    return results
+
+
+def run(image_path=DEFAULT_IMAGE, repeat=20):
+    model = model_registry.get_model()
+    report = {
+        "meta": {
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "cpus": os.cpu_count(),
+            "model": str(model_registry.loaded_models()[-1]),
+            "repeat": repeat,
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "model_load": bench_model_load(max(3, repeat // 5)),
+        "report": bench_report(repeat),
+        "startup": bench_startup(max(3, repeat // 4)),
+        "tracker": bench_tracker(repeat),
+    }
+    model = model_registry.get_model()
+    for name, image in test_images(image_path).items():
+        report[name] = bench_image(model, image, repeat)
+    return report
+
+
+# ============================================================
+# 📊 COMPARING WITH A BASELINE
+# ============================================================
+def compare(current, baseline, prefix=""):
+    """Yield (stage, baseline p50, current p50, change %) for every stage."""
+    for key, value in current.items():
+        if key == "meta" or not isinstance(baseline.get(key), dict):
+            continue
+        if isinstance(value, dict) and "p50_ms" in value:
+            old, new = baseline[key]["p50_ms"], value["p50_ms"]
+            change = (new - old) / old * 100 if old else 0.0
+            yield prefix + key, old, new, change
+        elif isinstance(value, dict):
+            yield from compare(value, baseline[key], prefix + key + ".")
+
+
+def print_results(report):
+    for section, stages in report.items():
+        if section == "meta":
+            continue
+        if "p50_ms" in stages:
+            stages = {"": stages}
+        print(f"\n📊 {section}")
+        for stage, s in stages.items():
+            if isinstance(s, dict):
+                print(f"   {stage:<16} p50 {s['p50_ms']:>9.3f} ms | p95 {s['p95_ms']:>9.3f} ms"
+                      f" | p99 {s['p99_ms']:>9.3f} ms | {s['per_second']}/s")
+            else:
+                print(f"   {stage:<16} {s}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark every monitor stage")
+    parser.add_argument("--image", default=DEFAULT_IMAGE)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("-o", "--output", help="write results to this JSON file")
+    parser.add_argument("--baseline", help="JSON file from an earlier run to compare with")
+    parser.add_argument("--fail-over", type=float, default=None,
+                        help="exit 1 if any stage p50 is this many %% slower than baseline")
+    parser.add_argument("--startup", action="store_true",
+                        help="only measure how long commands take to start")
+    parser.add_argument("--tracker", action="store_true",
+                        help="only measure the people tracker")
+    args = parser.parse_args()
+
+    print("=" * 50)
+    print("⏱️  Benchmarking AI Security Monitor")
+    print("=" * 50)
+
+    if args.startup:
+        report = {"startup": bench_startup(args.repeat)}
+    elif args.tracker:
+        report = {"tracker": bench_tracker(args.repeat)}
+    else:
+        report = run(args.image, args.repeat)
+    print_results(report)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"\n💾 Saved results to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        print("\n📈 Compared with baseline (p50):")
+        slower = []
+        for stage, old, new, change in compare(report, baseline):
+            mark = "🔺" if change > 5 else "🔻" if change < -5 else "  "
+            print(f"   {mark} {stage:<30} {old:>9.3f} -> {new:>9.3f} ms ({change:+.1f}%)")
+            if args.fail_over is not None and change > args.fail_over:
+                slower.append(stage)
+        if slower:
+            print(f"\n❌ Slower than baseline: {', '.join(slower)}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
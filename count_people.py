@@ -1,17 +1,19 @@
 # ✅ STEP 8: Count People in the Image
 # This is where we COUNT specific objects!
 
-from ultralytics import YOLO
 import cv2
 import os
 
+from detections import Detections
+from model_registry import get_model
+
 print("="*50)
 print("🎯 STEP 8: Counting People")
 print("="*50)
 
 # Load model
 print("\n📥 Loading AI model...")
-model = YOLO("yolov8n.pt")
+model = get_model()
 
 # Load image
 image_path = "sample.jpg"
@@ -25,18 +27,9 @@ if os.path.exists(image_path):
     results = model(image)
     
     # Count people
-    person_count = 0
-    all_objects = []
-    
-    for detection in results[0].boxes:
-        class_id = int(detection.cls)
-        class_name = results[0].names[class_id]
-        confidence = float(detection.conf)
-        
-        all_objects.append(class_name)
-        
-        if class_name == "person":
-            person_count += 1
+    detections = Detections.from_result(results[0])
+    person_count = detections.count("person")
+    all_objects = detections.labels()
     
     # Show results
     print("\n📊 RESULTS:")
@@ -0,0 +1,351 @@
+# 🧬 Detection Cache
+# Don't run YOLO again on a photo we have already seen!
+#
+#   cache = get_detection_cache()
+#   context = model_identity()      (from model_registry)
+#   detections = cache.get(data=upload_bytes, image=image, context=context)
+#   if detections is None:
+#       detections = ...run the model...
+#       cache.put(detections, data=upload_bytes, image=image, context=context)
+#
+# The context must name the model: the cache outlives restarts, and
+# detections from the old model must not survive a switch to INT8 or a
+# new weights file.
+#
+# Only detections are stored: the compiled rules turn them into a decision
+# in microseconds, and that way a changed rules.json or zones.json is
+# always respected.
+#
+# Every entry has two keys:
+# - an exact hash of the file bytes (or the pixels), the decoded size and
+#   the context -> same upload again
+# - a 64-bit perceptual hash (dHash or pHash) -> the same scene, slightly
+#   re-encoded, resized or with a bit of sensor noise
+#
+# Near-duplicate matching is OFF unless asked for (near=True or
+# MONITOR_NEAR_DUPLICATES=1): a 64-bit hash barely changes when one person
+# walks into a fixed camera's view, so it would copy one frame's counts
+# onto the next. It suits re-uploads of the same photo, not archive scans.
+#
+# Perceptual hashes are looked up by Hamming distance with multi-index
+# hashing: the hash is split into max_distance + 1 chunks, and any hash
+# within max_distance bits must match at least one chunk exactly, so only
+# a few candidates are ever compared. Entries live in an LRU and, if
+# MONITOR_DETECTION_CACHE is set, in a SQLite file that survives restarts.
+
+import collections
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+import cv2
+import numpy as np
+
+import metrics
+from detections import Detections
+
+# Set MONITOR_DETECTION_CACHE=/path/to/detections.sqlite to turn on the disk tier
+CACHE_ENV = "MONITOR_DETECTION_CACHE"
+
+# Set MONITOR_NEAR_DUPLICATES=1 to also reuse detections of near-identical images
+NEAR_ENV = "MONITOR_NEAR_DUPLICATES"
+
+HASH_BITS = 64
+
+
+# ============================================================
+# 🔑 HASHES
+# ============================================================
+def exact_key(data=None, image=None, context=""):
+    """Hash of the file bytes, or of the pixels for frames.
+
+    The decoded shape and the context are part of the key, so the same file
+    decoded at another size (boxes in other pixels) is a different entry.
+    """
+    h = hashlib.blake2b(digest_size=16)
+    h.update(f"{context}|{None if image is None else image.shape}|".encode("utf-8"))
+    if data is not None:
+        h.update(b"bytes")
+        h.update(data)
+    else:
+        h.update(np.ascontiguousarray(image).data)
+    return h.hexdigest()
+
+
+def _bits_to_int(bits):
+    return int.from_bytes(np.packbits(bits.ravel()).tobytes(), "big")
+
+
+def _thumbnail(image, size):
+    """Small grayscale copy. Big frames are sub-sampled first (a free view),
+    so a 4K frame costs about as much as a 256px one."""
+    step = max(1, min(image.shape[:2]) // 256)
+    image = np.ascontiguousarray(image[::step, ::step])
+    gray = image if image.ndim == 2 else cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    return cv2.resize(gray, size, interpolation=cv2.INTER_AREA)
+
+
+def dhash(image):
+    """Difference hash: is each pixel of a 9x8 thumbnail brighter than its neighbour?"""
+    small = _thumbnail(image, (9, 8))
+    return _bits_to_int(small[:, 1:] > small[:, :-1])
+
+
+def phash(image):
+    """DCT hash: low frequencies of a 32x32 thumbnail above their median."""
+    small = _thumbnail(image, (32, 32)).astype(np.float32)
+    low = cv2.dct(small)[:8, :8]
+    return _bits_to_int(low > np.median(low.ravel()[1:]))
+
+
+HASHES = {"dhash": dhash, "phash": phash}
+
+
+def hamming(a, b):
+    return bin(a ^ b).count("1")
+
+
+# ============================================================
+# 🔎 HAMMING INDEX
+# ============================================================
+class HammingIndex:
+    """Find a stored hash within max_distance bits (multi-index hashing)."""
+
+    def __init__(self, max_distance=4, bits=HASH_BITS):
+        self.max_distance = max_distance
+        chunks = max_distance + 1
+        edges = [round(i * bits / chunks) for i in range(chunks + 1)]
+        self._ranges = [(lo, (1 << (hi - lo)) - 1) for lo, hi in zip(edges, edges[1:])]
+        self._tables = [collections.defaultdict(set) for _ in self._ranges]
+        self._hashes = {}  # key -> hash
+
+    def __len__(self):
+        return len(self._hashes)
+
+    def _parts(self, value):
+        return [(value >> shift) & mask for shift, mask in self._ranges]
+
+    def add(self, key, value):
+        self.remove(key)
+        self._hashes[key] = value
+        for table, part in zip(self._tables, self._parts(value)):
+            table[part].add(key)
+
+    def remove(self, key):
+        value = self._hashes.pop(key, None)
+        if value is None:
+            return
+        for table, part in zip(self._tables, self._parts(value)):
+            bucket = table[part]
+            bucket.discard(key)
+            if not bucket:
+                del table[part]
+
+    def nearest(self, value, accept=None):
+        """(key, distance) of the closest hash within max_distance, or (None, None).
+
+        accept(key) can reject candidates (e.g. a different image size).
+        """
+        best, best_distance = None, self.max_distance + 1
+        seen = set()
+        for table, part in zip(self._tables, self._parts(value)):
+            for key in table.get(part, ()):
+                if key in seen:
+                    continue
+                seen.add(key)
+                distance = hamming(value, self._hashes[key])
+                if distance < best_distance and (accept is None or accept(key)):
+                    best, best_distance = key, distance
+                    if distance == 0:
+                        return best, 0
+        return (best, best_distance) if best is not None else (None, None)
+
+
+# ============================================================
+# 🧬 DETECTION CACHE
+# ============================================================
+class DetectionCache:
+    """LRU of detections keyed by exact + perceptual hash."""
+
+    def __init__(self, max_size=1024, max_distance=1, method="phash", db_path=None,
+                 disk_size=None, near=False):
+        if method not in HASHES:
+            raise ValueError(f"method must be one of {sorted(HASHES)}, got {method!r}")
+        self.max_size = max_size
+        self.disk_size = disk_size or max_size * 10
+        self._writes = 0
+        self.method = method
+        self.near = near
+        self._hash = HASHES[method]
+        self._memory = collections.OrderedDict()  # exact key -> entry
+        self.max_distance = max_distance
+        self._index = HammingIndex(max_distance)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.near_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self._db = None
+        if db_path:
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS detections ("
+                " key TEXT PRIMARY KEY, context TEXT NOT NULL, method TEXT NOT NULL,"
+                " phash TEXT NOT NULL, shape TEXT NOT NULL, xyxy BLOB NOT NULL,"
+                " conf BLOB NOT NULL, cls BLOB NOT NULL, names TEXT NOT NULL,"
+                " used REAL NOT NULL)"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS detections_used ON detections (used)")
+            self._db.commit()
+            self._load()
+
+    def perceptual_hash(self, image):
+        """This cache's perceptual hash (dHash or pHash) of an image."""
+        return self._hash(image)
+
+    # ---------- entries ----------
+    @staticmethod
+    def _shape(image):
+        return None if image is None else tuple(image.shape[:2])
+
+    def _remember(self, key, entry):
+        """Caller holds the lock."""
+        self._memory[key] = entry
+        self._memory.move_to_end(key)
+        if entry["phash"] is not None:
+            self._index.add(key, entry["phash"])
+        while len(self._memory) > self.max_size:
+            old, _ = self._memory.popitem(last=False)
+            self._index.remove(old)
+            self.evictions += 1
+
+    def _load(self):
+        """Fill memory with the most recently used rows from disk."""
+        rows = self._db.execute(
+            "SELECT key, context, phash, shape, xyxy, conf, cls, names"
+            " FROM detections WHERE method = ? ORDER BY used DESC LIMIT ?",
+            (self.method, self.max_size),
+        ).fetchall()
+        for key, context, ph, shape, xyxy, conf, cls, names in reversed(rows):
+            names = {int(k): v for k, v in json.loads(names).items()}
+            detections = Detections(
+                np.frombuffer(xyxy, dtype=np.float32).reshape(-1, 4).copy(),
+                np.frombuffer(conf, dtype=np.float32).copy(),
+                np.frombuffer(cls, dtype=np.int64).copy(),
+                names,
+            )
+            self._remember(key, {
+                "context": context,
+                "phash": int(ph, 16),
+                "shape": tuple(json.loads(shape)),
+                "detections": detections,
+            })
+
+    # ---------- lookups ----------
+    def get(self, data=None, image=None, context="", near=None):
+        """Detections for a seen (or, with near, near-identical) image, or None.
+
+        context separates results that aren't interchangeable (e.g. tiled
+        vs normal detection, or a different model). near defaults to the
+        cache's setting.
+        """
+        near = self.near if near is None else near
+        key = exact_key(data, image, context)
+        with self._lock:
+            entry = self._memory.get(key)
+            kind = "exact"
+            if entry is None and near and image is not None:
+                shape = self._shape(image)
+                near, _ = self._index.nearest(
+                    self._hash(image),
+                    accept=lambda k: (self._memory[k]["context"] == context
+                                      and self._memory[k]["shape"] == shape),
+                )
+                if near is not None:
+                    key, entry, kind = near, self._memory[near], "near"
+
+            if entry is None:
+                self.misses += 1
+                metrics.inc("detection_cache_misses")
+                return None
+            self._memory.move_to_end(key)
+            self.hits += 1
+            self.near_hits += kind == "near"
+            metrics.inc("detection_cache_hits", kind=kind)
+            return entry["detections"]
+
+    # ---------- storing ----------
+    def put(self, detections, data=None, image=None, context=""):
+        """Remember detections for an image (bytes and/or decoded pixels)."""
+        key = exact_key(data, image, context)
+        entry = {
+            "context": context,
+            "phash": self._hash(image) if image is not None else None,
+            "shape": self._shape(image),
+            "detections": detections,
+        }
+        with self._lock:
+            self._remember(key, entry)
+            if self._db is not None and entry["phash"] is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO detections VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        key, context, self.method, format(entry["phash"], "x"),
+                        json.dumps(entry["shape"]),
+                        np.ascontiguousarray(detections.xyxy, dtype=np.float32).tobytes(),
+                        np.ascontiguousarray(detections.conf, dtype=np.float32).tobytes(),
+                        np.ascontiguousarray(detections.cls, dtype=np.int64).tobytes(),
+                        json.dumps({str(k): v for k, v in detections.names.items()}),
+                        time.time(),
+                    ),
+                )
+                self._writes += 1
+                if self._writes % 64 == 0:
+                    # Keep only the disk_size most recently stored rows
+                    self._db.execute(
+                        "DELETE FROM detections WHERE key NOT IN"
+                        " (SELECT key FROM detections ORDER BY used DESC LIMIT ?)",
+                        (self.disk_size,),
+                    )
+                self._db.commit()
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+            self._index = HammingIndex(self.max_distance)
+            if self._db is not None:
+                self._db.execute("DELETE FROM detections")
+                self._db.commit()
+
+    # ---------- stats ----------
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "near_hits": self.near_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "size": len(self._memory),
+            "hit_rate": round(self.hits / total, 3) if total else 0.0,
+        }
+
+
+# ============================================================
+# 🔗 SHARED CACHE
+# ============================================================
+_shared = None
+_shared_lock = threading.Lock()
+
+
+def get_detection_cache():
+    """The process-wide detection cache (disk tier if MONITOR_DETECTION_CACHE is set)."""
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            near = os.getenv(NEAR_ENV, "").lower() in ("1", "true", "yes")
+            _shared = DetectionCache(db_path=os.getenv(CACHE_ENV), near=near)
+        return _shared
@@ -0,0 +1,99 @@
+# 📦 Detection Results as Arrays
+# Pull every box out of a YOLO result in ONE step, then count with NumPy!
+
+import numpy as np
+
+
+class Detections:
+    """All boxes from one YOLO result, stored as NumPy arrays.
+
+    - xyxy: (N, 4) box corners in pixels
+    - conf: (N,) confidence scores
+    - cls:  (N,) class ids
+    - names: class id -> class name (from the model)
+    """
+
+    def __init__(self, xyxy, conf, cls, names):
+        self.xyxy = xyxy
+        self.conf = conf
+        self.cls = cls
+        self.names = names
+
+    @classmethod
+    def from_result(cls, result):
+        # boxes.data is [x1, y1, x2, y2, conf, cls] per row, so a single
+        # .cpu().numpy() moves everything we need out of the tensor.
+        data = result.boxes.data
+        if hasattr(data, "cpu"):
+            data = data.cpu().numpy()
+        data = np.asarray(data, dtype=np.float32).reshape(-1, 6)
+        return cls(
+            xyxy=data[:, :4],
+            conf=data[:, 4],
+            cls=data[:, 5].astype(np.int64),
+            names=result.names,
+        )
+
+    @classmethod
+    def empty(cls, names=None):
+        return cls(
+            xyxy=np.zeros((0, 4), dtype=np.float32),
+            conf=np.zeros(0, dtype=np.float32),
+            cls=np.zeros(0, dtype=np.int64),
+            names=names or {},
+        )
+
+    def __len__(self):
+        return len(self.cls)
+
+    def class_id(self, name):
+        """Return the class id for a name, or -1 if the model doesn't know it."""
+        for class_id, class_name in self.names.items():
+            if class_name == name:
+                return class_id
+        return -1
+
+    def mask(self, name):
+        """Boolean mask of the boxes belonging to one class."""
+        return self.cls == self.class_id(name)
+
+    def count(self, name):
+        """Count boxes of one class (e.g. "person")."""
+        return int(np.count_nonzero(self.mask(name)))
+
+    def counts(self):
+        """Count vector indexed by class id."""
+        return np.bincount(self.cls, minlength=len(self.names))
+
+    def histogram(self):
+        """{class name: count} for every class that was found."""
+        counts = self.counts()
+        return {self.names[i]: int(counts[i]) for i in np.flatnonzero(counts)}
+
+    def select(self, keep):
+        """Return a new Detections with only the rows in keep (mask or index)."""
+        return Detections(self.xyxy[keep], self.conf[keep], self.cls[keep], self.names)
+
+    def filter(self, min_conf=0.0, name=None):
+        """Keep boxes above a confidence, optionally of one class only."""
+        keep = self.conf >= min_conf
+        if name is not None:
+            keep &= self.mask(name)
+        return self.select(keep)
+
+    def labels(self):
+        """Class name for every box."""
+        if not len(self):
+            return []
+        lookup = np.array([self.names.get(i, str(i)) for i in range(self.cls.max() + 1)])
+        return lookup[self.cls].tolist()
+
+    def to_list(self):
+        """Detections as plain dicts, the format app.py shows to the user."""
+        labels = self.labels()
+        confs = (self.conf * 100).round(1).tolist()
+        boxes = self.xyxy.round(1).tolist()
+        return [
+            {"object": label.upper(), "confidence": f"{conf:.1f}%", "box": box}
+            for label, conf, box in zip(labels, confs, boxes)
+        ]
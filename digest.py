@@ -0,0 +1,165 @@
+# 🗞️ Digest Reports
+# ONE report for all cameras and zones, instead of one LLM call per alert!
+#
+#   digest = Digest()
+#   digest.add("lobby", decision, person_count=7, zone_counts=zone_counts)
+#   digest.add("parking", decision, person_count=1)
+#   ...
+#   for piece in service.stream(digest.prompt()):
+#       print(piece, end="")
+#
+# Every decision of the interval is folded into a small per-camera summary
+# as it arrives (frames, average and peak people, worst alert, busiest
+# zones), so the prompt stays the same size whether the interval had ten
+# frames or ten thousand. Cameras with the worst alerts come first.
+#
+# From the event store: add_rollup() for the full hours of a long window
+# (the hourly tables) and add_events() for the minutes around them, so
+# any --since is covered without loading every raw event.
+
+import json
+import time
+
+# Lowest to highest; unknown levels count as NONE
+ALERT_ORDER = ("NONE", "LOW", "MEDIUM", "HIGH", "CRITICAL")
+
+
+def _severity(level):
+    return ALERT_ORDER.index(level) if level in ALERT_ORDER else 0
+
+
+class Digest:
+    """Per-camera summary of every decision in one interval."""
+
+    def __init__(self):
+        self.cameras = {}
+        self.started = None
+        self.ended = None
+
+    def __len__(self):
+        return sum(cam["frames"] for cam in self.cameras.values())
+
+    def _camera(self, camera, start, end):
+        self.started = start if self.started is None else min(self.started, start)
+        self.ended = end if self.ended is None else max(self.ended, end)
+        cam = self.cameras.get(camera)
+        if cam is None:
+            cam = self.cameras[camera] = {
+                "frames": 0, "people_total": 0, "max_people": 0, "alert_frames": {},
+                "worst_alert": "NONE", "worst_status": "", "zones": {}, "last_ts": None,
+            }
+        return cam
+
+    @staticmethod
+    def _zones(cam, zone_people):
+        for zone, people in zone_people.items():
+            cam["zones"][zone] = max(cam["zones"].get(zone, 0), people)
+
+    def add(self, camera, decision, person_count, zone_counts=None, ts=None):
+        ts = time.time() if ts is None else ts
+        cam = self._camera(camera, ts, ts)
+        cam["frames"] += 1
+        cam["people_total"] += person_count
+        cam["max_people"] = max(cam["max_people"], person_count)
+
+        level = decision.get("alert_level") or "NONE"
+        cam["alert_frames"][level] = cam["alert_frames"].get(level, 0) + 1
+        if _severity(level) >= _severity(cam["worst_alert"]):
+            cam["worst_alert"] = level
+            cam["worst_status"] = decision.get("status") or ""
+        if cam["last_ts"] is None or ts >= cam["last_ts"]:
+            cam["last_ts"] = ts
+            cam["latest_alert"] = level
+            cam["latest_action"] = decision.get("action", "")
+
+        self._zones(cam, {zone: counts.get("person", 0)
+                          for zone, counts in (zone_counts or {}).items()})
+
+    def add_events(self, rows):
+        """Fold in rows from EventStore.events()."""
+        for row in rows:
+            decision = {"alert_level": row.get("alert_level"), "status": row.get("status")}
+            zones = json.loads(row["zones"]) if row.get("zones") else {}
+            self.add(row["camera"], decision, row["person_count"],
+                     zone_counts={zone: {"person": n} for zone, n in zones.items()},
+                     ts=row["ts"])
+
+    def add_rollup(self, rows):
+        """Fold in whole hours from EventStore.rollup().
+
+        Rollups only count HIGH/CRITICAL frames, so calmer frames are
+        counted under "LOWER".
+        """
+        for row in rows:
+            cam = self._camera(row["camera"], row["hour"], row["hour"] + 3600)
+            cam["frames"] += row["frames"]
+            cam["people_total"] += row["sum_people"]
+            cam["max_people"] = max(cam["max_people"], row["max_people"])
+            counts = {
+                "CRITICAL": row["critical"],
+                "HIGH": row["alerts"] - row["critical"],
+                "LOWER": row["frames"] - row["alerts"],
+            }
+            for level, frames in counts.items():
+                if frames:
+                    cam["alert_frames"][level] = cam["alert_frames"].get(level, 0) + frames
+            worst = "CRITICAL" if row["critical"] else "HIGH" if row["alerts"] else None
+            if worst and _severity(worst) >= _severity(cam["worst_alert"]):
+                cam["worst_alert"] = worst
+            self._zones(cam, row["zones"])
+
+    def summary(self):
+        """One dict per camera, worst alert (then most people) first."""
+        rows = []
+        for camera, cam in self.cameras.items():
+            row = {
+                "camera": camera,
+                "frames": cam["frames"],
+                "avg_people": round(cam["people_total"] / cam["frames"], 1),
+                "max_people": cam["max_people"],
+                "worst_alert": cam["worst_alert"],
+                "worst_status": cam["worst_status"],
+                "latest_alert": cam.get("latest_alert", "NONE"),
+                "alert_frames": cam["alert_frames"],
+            }
+            if cam.get("latest_action"):
+                row["latest_action"] = cam["latest_action"]
+            if cam["zones"]:
+                row["max_people_per_zone"] = cam["zones"]
+            rows.append(row)
+        rows.sort(key=lambda r: (_severity(r["worst_alert"]), r["max_people"]), reverse=True)
+        return rows
+
+    def prompt(self, max_cameras=50):
+        """One structured prompt covering every camera of the interval."""
+        rows = self.summary()
+        shown, hidden = rows[:max_cameras], rows[max_cameras:]
+        period = ""
+        if self.started is not None:
+            fmt = "%Y-%m-%d %H:%M:%S"
+            period = (f"from {time.strftime(fmt, time.localtime(self.started))}"
+                      f" to {time.strftime(fmt, time.localtime(self.ended))}")
+        extra = f"\n({len(hidden)} quieter cameras not listed.)" if hidden else ""
+        return f"""You are a friendly security report writer.
+
+Below is a summary of {len(rows)} cameras {period}, as JSON (one object per
+camera, most serious first):
+{json.dumps(shown, ensure_ascii=False, indent=1)}{extra}
+
+TASK: Write ONE short digest for the security team:
+1. One sentence on the overall situation.
+2. One bullet per camera that needs attention (HIGH or CRITICAL alerts), with what to do.
+3. One sentence saying the other cameras are fine, if they are.
+Keep it simple and calm."""
+
+    def cache_inputs(self):
+        """Everything prompt() depends on, for the report cache.
+
+        The period is the first and last decision, not the window, so
+        asking again with no new events reuses the report.
+        """
+        return {"cameras": self.summary(), "started": self.started, "ended": self.ended}
+
+    def clear(self):
+        self.cameras.clear()
+        self.started = self.ended = None
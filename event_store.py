@@ -0,0 +1,283 @@
+# 🗄️ Event Store
+# Remember every detection instead of forgetting it after printing!
+#
+#   store = EventStore("events.sqlite")
+#   store.append("lobby", person_count=4, decision=decision, counts={"person": 4})
+#   store.max_people_per_hour("lobby", since=time.time() - 7 * 86400)
+#
+# Writes go into a queue and a background thread saves them in batches, so
+# the detection loop never waits for the disk. SQLite runs in WAL mode
+# (readers don't block the writer) and hourly rollup tables (per camera,
+# and the busiest moment of every zone) are updated with every batch, so
+# history queries don't scan millions of rows.
+
+import atexit
+import json
+import os
+import queue
+import sqlite3
+import threading
+import time
+
+# Set MONITOR_EVENTS=/path/to/events.sqlite to record events from every entry point
+EVENTS_ENV = "MONITOR_EVENTS"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    ts REAL NOT NULL,
+    camera TEXT NOT NULL,
+    person_count INTEGER NOT NULL,
+    total_objects INTEGER NOT NULL,
+    alert_level TEXT,
+    status TEXT,
+    rule TEXT,
+    counts TEXT,
+    zones TEXT
+);
+CREATE INDEX IF NOT EXISTS events_camera_ts ON events (camera, ts);
+CREATE INDEX IF NOT EXISTS events_ts ON events (ts);
+
+CREATE TABLE IF NOT EXISTS hourly (
+    camera TEXT NOT NULL,
+    hour REAL NOT NULL,
+    frames INTEGER NOT NULL,
+    sum_people INTEGER NOT NULL,
+    max_people INTEGER NOT NULL,
+    alerts INTEGER NOT NULL,
+    critical INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (camera, hour)
+);
+
+CREATE TABLE IF NOT EXISTS hourly_zones (
+    camera TEXT NOT NULL,
+    hour REAL NOT NULL,
+    zone TEXT NOT NULL,
+    max_people INTEGER NOT NULL,
+    PRIMARY KEY (camera, hour, zone)
+);
+"""
+
+# Columns added after the first release: (table, column, definition)
+MIGRATIONS = (
+    ("events", "zones", "TEXT"),
+    ("hourly", "critical", "INTEGER NOT NULL DEFAULT 0"),
+)
+
+# Alert levels that count as an "alert" in the rollup
+ALERT_LEVELS = ("HIGH", "CRITICAL")
+
+
+class EventStore:
+    """Append-only store of per-frame results, backed by SQLite."""
+
+    def __init__(self, path, batch_size=500, flush_interval=1.0, max_queue=100000):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.dropped = 0
+        self.queued = 0
+        self.written = 0
+
+        self._queue = queue.Queue(maxsize=max_queue)
+        db = self._connect()
+        db.executescript(SCHEMA)
+        for table, column, definition in MIGRATIONS:
+            columns = {row[1] for row in db.execute(f"PRAGMA table_info({table})")}
+            if column not in columns:
+                db.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+        db.commit()
+        db.close()
+        self._closed = False
+        self._writer = threading.Thread(target=self._write_loop, daemon=True)
+        self._writer.start()
+
+    def _connect(self):
+        db = sqlite3.connect(self.path, check_same_thread=False)
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute("PRAGMA synchronous=NORMAL")
+        return db
+
+    # ---------- writing ----------
+    def append(self, camera, person_count, decision=None, counts=None,
+               total_objects=None, ts=None, zone_counts=None):
+        """Queue one event. Never blocks; drops the event if the queue is full.
+
+        zone_counts ({zone: {class: count}}) keeps the people per zone.
+        """
+        decision = decision or {}
+        zones = {zone: c.get("person", 0) for zone, c in (zone_counts or {}).items()}
+        row = (
+            time.time() if ts is None else ts,
+            camera,
+            int(person_count),
+            int(total_objects if total_objects is not None else person_count),
+            decision.get("alert_level"),
+            decision.get("status"),
+            decision.get("rule"),
+            json.dumps(counts) if counts else None,
+            json.dumps(zones) if zones else None,
+        )
+        try:
+            self._queue.put_nowait(row)
+            self.queued += 1
+        except queue.Full:
+            self.dropped += 1
+
+    def append_detections(self, camera, detections, decision=None, ts=None, zone_counts=None):
+        """append() straight from a Detections object."""
+        self.append(camera, detections.count("person"), decision,
+                    counts=detections.histogram(), total_objects=len(detections), ts=ts,
+                    zone_counts=zone_counts)
+
+    def _write_loop(self):
+        db = self._connect()
+        while True:
+            batch = []
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                try:
+                    row = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+                if row is None:
+                    self._save(db, batch)
+                    db.close()
+                    return
+                batch.append(row)
+            self._save(db, batch)
+
+    def _save(self, db, batch):
+        if not batch:
+            return
+        # Roll the batch up per (camera, hour) before touching the table
+        rollup, zone_rollup = {}, {}
+        for ts, camera, people, _, level, _, _, _, zones in batch:
+            key = (camera, ts - ts % 3600)
+            frames, total, most, alerts, critical = rollup.get(key, (0, 0, 0, 0, 0))
+            rollup[key] = (frames + 1, total + people, max(most, people),
+                           alerts + (level in ALERT_LEVELS), critical + (level == "CRITICAL"))
+            for zone, zone_people in json.loads(zones).items() if zones else ():
+                zone_key = key + (zone,)
+                zone_rollup[zone_key] = max(zone_rollup.get(zone_key, 0), zone_people)
+
+        with db:
+            db.executemany(
+                "INSERT INTO events (ts, camera, person_count, total_objects, alert_level,"
+                " status, rule, counts, zones) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                batch,
+            )
+            db.executemany(
+                "INSERT INTO hourly (camera, hour, frames, sum_people, max_people, alerts,"
+                " critical) VALUES (?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (camera, hour) DO UPDATE SET "
+                " frames = frames + excluded.frames,"
+                " sum_people = sum_people + excluded.sum_people,"
+                " max_people = MAX(max_people, excluded.max_people),"
+                " alerts = alerts + excluded.alerts,"
+                " critical = critical + excluded.critical",
+                [(camera, hour, *values) for (camera, hour), values in rollup.items()],
+            )
+            db.executemany(
+                "INSERT INTO hourly_zones VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (camera, hour, zone) DO UPDATE SET"
+                " max_people = MAX(max_people, excluded.max_people)",
+                [(*key, most) for key, most in zone_rollup.items()],
+            )
+        self.written += len(batch)
+
+    def flush(self, timeout=10.0):
+        """Wait until everything queued so far has been written."""
+        target = self.queued
+        end = time.monotonic() + timeout
+        while self.written < target and time.monotonic() < end:
+            time.sleep(0.01)
+
+    def close(self):
+        if not self._closed:
+            self._closed = True
+            self._queue.put(None)
+            self._writer.join(timeout=10)
+
+    # ---------- queries ----------
+    def _query(self, sql, params):
+        db = self._connect()
+        try:
+            db.row_factory = sqlite3.Row
+            return [dict(row) for row in db.execute(sql, params)]
+        finally:
+            db.close()
+
+    def events(self, camera=None, since=0.0, until=None, limit=1000):
+        """Raw events in a time range, newest first."""
+        until = time.time() if until is None else until
+        if camera is None:
+            return self._query(
+                "SELECT * FROM events WHERE ts BETWEEN ? AND ? ORDER BY ts DESC LIMIT ?",
+                (since, until, limit),
+            )
+        return self._query(
+            "SELECT * FROM events WHERE camera = ? AND ts BETWEEN ? AND ? "
+            "ORDER BY ts DESC LIMIT ?",
+            (camera, since, until, limit),
+        )
+
+    def hourly(self, camera, since=0.0, until=None):
+        """Hourly rollups: frames, average and max people, alert count."""
+        until = time.time() if until is None else until
+        return self._query(
+            "SELECT hour, frames, max_people, alerts,"
+            " CAST(sum_people AS REAL) / frames AS avg_people"
+            " FROM hourly WHERE camera = ? AND hour BETWEEN ? AND ? ORDER BY hour",
+            (camera, since - since % 3600, until),
+        )
+
+    def rollup(self, since, until):
+        """Hourly rollups of every camera for the hours fully inside
+        [since, until), each with a {zone: max people} dict."""
+        first, last = since + (-since) % 3600, until - until % 3600
+        rows = self._query(
+            "SELECT camera, hour, frames, sum_people, max_people, alerts, critical"
+            " FROM hourly WHERE hour >= ? AND hour < ? ORDER BY hour",
+            (first, last),
+        )
+        zones = {}
+        for row in self._query(
+            "SELECT camera, hour, zone, max_people FROM hourly_zones"
+            " WHERE hour >= ? AND hour < ?",
+            (first, last),
+        ):
+            zones.setdefault((row["camera"], row["hour"]), {})[row["zone"]] = row["max_people"]
+        for row in rows:
+            row["zones"] = zones.get((row["camera"], row["hour"]), {})
+        return rows
+
+    def max_people_per_hour(self, camera, since=0.0, until=None):
+        """{hour start timestamp: max people} - e.g. for "last week" charts."""
+        return {row["hour"]: row["max_people"] for row in self.hourly(camera, since, until)}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+# ============================================================
+# 🔗 SHARED STORE
+# ============================================================
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_event_store():
+    """Process-wide store at MONITOR_EVENTS, or None when it isn't set."""
+    global _store
+    path = os.getenv(EVENTS_ENV)
+    if not path:
+        return None
+    with _store_lock:
+        if _store is None:
+            _store = EventStore(path)
+            # The writer is a daemon thread: save the last batch on exit
+            atexit.register(_store.close)
+        return _store
@@ -1,10 +1,13 @@
 # ✅ STEP 10: Generate a Report with Google Gemini (FIXED VERSION)
 # Uses NEW google-genai SDK (SUPPORTED)
 
-from ultralytics import YOLO
 import cv2
 import os
-from google import genai
+
+from detections import Detections
+from model_registry import get_model
+from report_cache import get_report_cache
+from rules import decide_people
 
 print("=" * 50)
 print("🎯 STEP 10: Generating Report with Gemini")
@@ -21,7 +24,9 @@ if not API_KEY:
 
 print("✅ Gemini API key loaded securely")
 
-# 🤖 Initialize Gemini client
+# 🤖 Initialize Gemini client (the SDK is only loaded once we have a key)
+from google import genai
+
 client = genai.Client(
     api_key=API_KEY,
     http_options={"api_version": "v1"}
@@ -31,7 +36,7 @@ print("✅ Gemini connected!")
 
 # 📥 Load YOLO model
 print("\n📥 Loading YOLO model...")
-model = YOLO("yolov8n.pt")
+model = get_model()
 
 # 📷 Image path
 image_path = "sample.jpg"
@@ -48,15 +53,10 @@ print("🔍 Detecting objects...")
 results = model(image)
 
 # 👥 Count people
-person_count = 0
-for box in results[0].boxes:
-    class_id = int(box.cls)
-    class_name = results[0].names[class_id]
-    if class_name == "person":
-        person_count += 1
+person_count = Detections.from_result(results[0]).count("person")
 
-# 📊 Decide area status
-status = "CROWDED" if person_count > 5 else "NORMAL"
+# 📊 Decide area status (same rules as the app)
+status = decide_people(person_count)["status"]
 
 # 📝 Create prompt
 print("\n📝 Creating prompt for Gemini...")
@@ -76,12 +76,10 @@ Keep it simple, calm, and helpful.
 print("🤖 Asking Gemini to write a report...")
 
 try:
-    response = client.models.generate_content(
-        model="gemini-pro",
-        contents=prompt
-    )
-
-    report = response.text
+    # Reuse a report for the same situation if we already have one
+    report_cache = get_report_cache()
+    report_inputs = {"person_count": person_count, "status": status}
+    report = report_cache.get(report_inputs, "gemini-pro")
 
     print("\n" + "=" * 50)
     print("📊 SECURITY REPORT")
@@ -91,7 +89,23 @@ try:
     print("🤖 Model Used    : gemini-pro")
     print("\n📝 AI-Generated Report:")
     print("-" * 50)
-    print(report)
+
+    if report is None:
+        # Print the report as Gemini writes it, then remember the whole text
+        pieces = []
+        for chunk in client.models.generate_content_stream(
+            model="gemini-pro",
+            contents=prompt
+        ):
+            if chunk.text:
+                pieces.append(chunk.text)
+                print(chunk.text, end="", flush=True)
+        print()
+        report = "".join(pieces)
+        report_cache.put(report_inputs, "gemini-pro", report)
+    else:
+        print(report)
+        print("♻️  Reused cached report")
     print("-" * 50)
     print("\n✨ Report generated successfully!")
 
@@ -1,10 +1,14 @@
 # ✅ STEP 10: Generate a Report with OpenAI GPT-4/GPT-4o
 # FREE TRIAL: Get $5 free credits at https://platform.openai.com
 
-from ultralytics import YOLO
 import cv2
 import os
 
+from detections import Detections
+from model_registry import get_model
+from report_service import ReportError, ReportService, openai_provider
+from rules import decide_people
+
 print("="*50)
 print("🎯 STEP 10: Generating Report with OpenAI")
 print("="*50)
@@ -28,10 +32,10 @@ try:
     from openai import OpenAI
     print("✅ OpenAI library found!")
 except ImportError:
-    print("Installing OpenAI library...")
-    import subprocess
-    subprocess.check_call(["pip", "install", "openai"])
-    from openai import OpenAI
+    print("❌ ERROR: The OpenAI library is not installed!")
+    print("💡 Install it once with:")
+    print("   pip install openai")
+    exit()
 
 # Create OpenAI client
 client = OpenAI(api_key=API_KEY)
@@ -39,7 +43,7 @@ print("✅ OpenAI connected!")
 
 # Load YOLO model
 print("\n📥 Loading YOLO model...")
-model = YOLO("yolov8n.pt")
+model = get_model()
 
 image_path = "sample.jpg"
 
@@ -52,18 +56,10 @@ if os.path.exists(image_path):
     results = model(image)
     
     # Count people
-    person_count = 0
-    for detection in results[0].boxes:
-        class_id = int(detection.cls)
-        class_name = results[0].names[class_id]
-        if class_name == "person":
-            person_count += 1
+    person_count = Detections.from_result(results[0]).count("person")
     
-    # Make decision
-    if person_count > 5:
-        status = "CROWDED"
-    else:
-        status = "NORMAL"
+    # Make decision (same rules as the app)
+    status = decide_people(person_count)["status"]
     
     # Create a prompt
     print("\n📝 Creating prompt for GPT-4...")
@@ -88,41 +84,35 @@ Write like you're talking to a 10-year-old. Keep it simple and helpful!"""
             "gpt-3.5-turbo",   # Cheap/fast
         ]
         
-        report = None
-        used_model = None
+        # Models are tried with timeouts; if one is slow the next starts too.
+        # A report for the same situation is reused from the cache.
+        service = ReportService([
+            openai_provider(client, name, temperature=0.7, max_tokens=200)
+            for name in models_to_try
+        ])
+        report_inputs = {"person_count": person_count, "status": status}
         
-        for model_name in models_to_try:
-            try:
-                print(f"   Trying {model_name}...")
-                
-                response = client.chat.completions.create(
-                    model=model_name,
-                    messages=[
-                        {
-                            "role": "user",
-                            "content": prompt
-                        }
-                    ],
-                    temperature=0.7,
-                    max_tokens=200
-                )
-                
-                report = response.choices[0].message.content
-                used_model = model_name
-                print(f"   ✅ Success with {model_name}!")
-                break
-                
-            except Exception as e:
-                error_str = str(e).lower()
+        try:
+            # Print the report word by word as GPT writes it
+            stream = service.stream(prompt, report_inputs)
+            print("\n📝 AI-Generated Report:")
+            print("-"*50)
+            for piece in stream:
+                print(piece, end="", flush=True)
+            print()
+            print("-"*50)
+            report, used_model = stream.text, stream.model
+            print(f"   ✅ Success with {used_model}!")
+        except ReportError as e:
+            report, used_model = None, None
+            for model_name, error in e.errors:
+                error_str = error.lower()
                 if "rate_limit" in error_str or "quota" in error_str:
-                    print(f"   ❌ {model_name}: Quota exceeded, trying next...")
-                    continue
+                    print(f"   ❌ {model_name}: Quota exceeded")
                 elif "not found" in error_str or "does not exist" in error_str:
-                    print(f"   ❌ {model_name}: Not available, trying next...")
-                    continue
+                    print(f"   ❌ {model_name}: Not available")
                 else:
-                    print(f"   ❌ {model_name}: Error - {str(e)[:50]}...")
-                    continue
+                    print(f"   ❌ {model_name}: Error - {error[:50]}...")
         
         if report:
             # Show results
@@ -132,10 +122,6 @@ Write like you're talking to a 10-year-old. Keep it simple and helpful!"""
             print(f"👥 People Detected: {person_count}")
             print(f"📊 Status: {status}")
             print(f"✅ Model Used: {used_model} (OpenAI)")
-            print("\n📝 AI-Generated Report:")
-            print("-"*50)
-            print(report)
-            print("-"*50)
             print("\n✨ Report generated successfully!")
             print(f"\n💡 Check your usage: https://platform.openai.com/account/usage/overview")
         else:
@@ -0,0 +1,242 @@
+# 📈 Metrics and Tracing
+# Know how long every step takes - and how often things go wrong!
+#
+#   with metrics.stage("inference"):
+#       results = model(image)
+#
+#   metrics.inc("frames_processed")
+#   metrics.inc("llm_failures", model="gemini-pro")
+#
+#   metrics.start_server(9100)   ->   http://localhost:9100/metrics
+#
+# Numbers are kept in plain Python objects (no extra dependency) and served
+# in the Prometheus text format. If MONITOR_TRACING=1 and OpenTelemetry is
+# installed, every stage is also emitted as a trace span.
+
+import bisect
+import contextlib
+import functools
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Seconds. Covers ~0.1 ms box extraction up to multi-second LLM calls.
+BUCKETS = (0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+           0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+TRACING_ENV = "MONITOR_TRACING"
+# Set MONITOR_METRICS_PORT=9100 to serve /metrics from any entry point
+PORT_ENV = "MONITOR_METRICS_PORT"
+
+
+# ============================================================
+# 📊 HISTOGRAMS AND COUNTERS
+# ============================================================
+class Histogram:
+    """Latency histogram with fixed buckets (cheap to update)."""
+
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # last slot is +Inf
+        self.total = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, seconds):
+        i = bisect.bisect_left(self.buckets, seconds)
+        with self._lock:
+            self.counts[i] += 1
+            self.total += seconds
+            self.count += 1
+
+    def snapshot(self):
+        """(bucket counts, total, count), consistent with each other."""
+        with self._lock:
+            return list(self.counts), self.total, self.count
+
+    def percentile(self, q):
+        """Approximate percentile (upper bucket bound), q in 0..100."""
+        counts, _, count = self.snapshot()
+        if not count:
+            return 0.0
+        target = count * q / 100
+        running = 0
+        for bound, n in zip(self.buckets + (float("inf"),), counts):
+            running += n
+            if running >= target:
+                return bound
+        return float("inf")
+
+
+class Registry:
+    """All stage histograms and counters for this process."""
+
+    def __init__(self):
+        self.histograms = {}
+        self.counters = {}
+        self._lock = threading.Lock()
+
+    def histogram(self, name):
+        hist = self.histograms.get(name)
+        if hist is None:
+            with self._lock:
+                hist = self.histograms.setdefault(name, Histogram())
+        return hist
+
+    def observe(self, name, seconds):
+        self.histogram(name).observe(seconds)
+
+    def inc(self, name, amount=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + amount
+
+    def counter(self, name, **labels):
+        return self.counters.get((name, tuple(sorted(labels.items()))), 0)
+
+    def reset(self):
+        with self._lock:
+            self.histograms.clear()
+            self.counters.clear()
+
+    def _copy(self):
+        """The histogram and counter dicts, copied while no one adds keys."""
+        with self._lock:
+            return dict(self.histograms), dict(self.counters)
+
+    # ---------- Prometheus text format ----------
+    def render(self):
+        lines = [
+            "# HELP monitor_stage_seconds Time spent in each pipeline stage",
+            "# TYPE monitor_stage_seconds histogram",
+        ]
+        histograms, counters = self._copy()
+        for stage, hist in sorted(histograms.items()):
+            counts, total, count = hist.snapshot()
+            running = 0
+            for bound, n in zip(hist.buckets, counts):
+                running += n
+                lines.append(f'monitor_stage_seconds_bucket{{stage="{stage}",le="{bound}"}} {running}')
+            lines.append(f'monitor_stage_seconds_bucket{{stage="{stage}",le="+Inf"}} {count}')
+            lines.append(f'monitor_stage_seconds_sum{{stage="{stage}"}} {total}')
+            lines.append(f'monitor_stage_seconds_count{{stage="{stage}"}} {count}')
+
+        seen = set()
+        for (name, labels), value in sorted(counters.items()):
+            if name not in seen:
+                lines.append(f"# TYPE monitor_{name}_total counter")
+                seen.add(name)
+            label_text = ",".join(f'{k}="{v}"' for k, v in labels)
+            label_text = "{" + label_text + "}" if label_text else ""
+            lines.append(f"monitor_{name}_total{label_text} {value}")
+        return "\n".join(lines) + "\n"
+
+    def summary(self):
+        """{stage: {count, mean_ms, p95_ms}} - handy for printing."""
+        result = {}
+        for stage, hist in self._copy()[0].items():
+            _, total, count = hist.snapshot()
+            result[stage] = {
+                "count": count,
+                "mean_ms": round(total / count * 1000, 3) if count else 0.0,
+                "p95_ms": round(hist.percentile(95) * 1000, 3),
+            }
+        return result
+
+
+REGISTRY = Registry()
+observe = REGISTRY.observe
+inc = REGISTRY.inc
+
+
+# ============================================================
+# 🔭 OPTIONAL TRACE SPANS
+# ============================================================
+_tracer = None
+if os.getenv(TRACING_ENV):
+    try:
+        from opentelemetry import trace
+        _tracer = trace.get_tracer("ai_security_monitor")
+    except ImportError:
+        print("⚠️  MONITOR_TRACING is set but opentelemetry is not installed")
+
+
+# ============================================================
+# ⏱️ TIMING HELPERS
+# ============================================================
+@contextlib.contextmanager
+def stage(name):
+    """Time a block of code as one pipeline stage."""
+    span = _tracer.start_as_current_span(name) if _tracer is not None else None
+    if span is not None:
+        span.__enter__()
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        REGISTRY.observe(name, time.perf_counter() - start)
+        if span is not None:
+            span.__exit__(None, None, None)
+
+
+def timed(name):
+    """Decorator version of stage()."""
+    def decorate(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with stage(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def record_model_speed(result):
+    """Record the preprocess/inference/postprocess times Ultralytics measured."""
+    for name, ms in result.speed.items():
+        if ms is not None:
+            REGISTRY.observe(name, ms / 1000)
+
+
+# ============================================================
+# 🌐 /metrics ENDPOINT
+# ============================================================
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = REGISTRY.render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass  # keep the console clean
+
+
+_server = None
+_server_lock = threading.Lock()
+
+
+def start_server(port=9100, host="127.0.0.1"):
+    """Serve /metrics from a background thread (only starts once).
+
+    Every Streamlit session calls this, so the check-and-bind is locked.
+    """
+    global _server
+    with _server_lock:
+        if _server is None:
+            _server = ThreadingHTTPServer((host, port), _MetricsHandler)
+            threading.Thread(target=_server.serve_forever, daemon=True).start()
+    return _server
+
+
+def start_server_from_env():
+    """Start the /metrics server if MONITOR_METRICS_PORT is set."""
+    port = os.getenv(PORT_ENV)
+    if port:
+        return start_server(int(port))
+    return None
@@ -0,0 +1,114 @@
+# 🧠 Shared Model Registry
+# Loads each YOLO model ONCE per process and shares it everywhere!
+
+import os
+import threading
+
+import numpy as np
+
+import tuning
+from backends import BACKEND_ENV, gpu_available, load_model, select_backend
+
+DEFAULT_WEIGHTS = "yolov8n.pt"
+
+# ============================================================
+# 📦 REGISTRY STATE
+# ============================================================
+# Keyed by (weights, device, backend). Python keeps imported modules in memory,
+# so Streamlit reruns and every session in the process see the same dict.
+_models = {}
+_lock = threading.Lock()
+
+
+def _key(weights, device, backend):
+    # The tuning profile (see optimize.py) may swap the default model for a
+    # faster CPU variant, e.g. INT8 ONNX, unless a backend was asked for or
+    # the model will run on a GPU
+    if weights == DEFAULT_WEIGHTS and backend is None and not os.getenv(BACKEND_ENV) \
+            and (device == "cpu" or (device is None and not gpu_available())):
+        tuned = tuning.profile_model()
+        if tuned is not None:
+            weights, backend = tuned
+    device = str(device) if device is not None else "auto"
+    return (str(weights), device, backend or select_backend(_device_or_none(device)))
+
+
+def _device_or_none(device):
+    return None if device == "auto" else device
+
+
+def _load(key, warmup):
+    tuning.activate()  # thread counts from the profile, before the first model
+    weights, device, backend = key
+    device = _device_or_none(device)
+    # Profile (or worker) thread counts reach ONNX/OpenVINO sessions too
+    model = load_model(weights, backend, device, threads=tuning.current_threads())
+    if warmup:
+        warm_up(model, device)
+    return model
+
+
+def warm_up(model, device=None, size=640):
+    """Run one dummy inference so the first real frame is not slow."""
+    dummy = np.zeros((size, size, 3), dtype=np.uint8)
+    model(dummy, device=device, verbose=False)
+
+
+def model_identity(weights=DEFAULT_WEIGHTS, device=None, backend=None):
+    """Names the model get_model() would return, for keying stored results.
+
+    Includes the profile's weights swap, the backend and the weights file's
+    modification time, so results from another model never look like ours.
+    """
+    weights, _, backend = _key(weights, device, backend)
+    try:
+        mtime = int(os.path.getmtime(weights))
+    except OSError:
+        mtime = 0
+    return f"{weights}|{backend}|{mtime}"
+
+
+def get_model(weights=DEFAULT_WEIGHTS, device=None, warmup=True, backend=None):
+    """Return the shared model for (weights, device, backend), loading it if needed.
+
+    backend is "torch", "onnx" or "openvino"; None picks the fastest installed.
+    """
+    key = _key(weights, device, backend)
+    model = _models.get(key)
+    if model is not None:
+        return model
+
+    with _lock:
+        # Another thread may have loaded it while we waited
+        model = _models.get(key)
+        if model is None:
+            model = _load(key, warmup)
+            _models[key] = model
+    return model
+
+
+def evict(weights=DEFAULT_WEIGHTS, device=None, backend=None):
+    """Drop a model from the registry. Returns True if it was loaded."""
+    with _lock:
+        return _models.pop(_key(weights, device, backend), None) is not None
+
+
+def reload(weights=DEFAULT_WEIGHTS, device=None, warmup=True, backend=None):
+    """Load a fresh copy (e.g. after the weights file changed on disk)."""
+    key = _key(weights, device, backend)
+    model = _load(key, warmup)
+    with _lock:
+        _models[key] = model
+    return model
+
+
+def clear():
+    """Drop every loaded model."""
+    with _lock:
+        _models.clear()
+
+
+def loaded_models():
+    """List the (weights, device, backend) keys currently in memory."""
+    with _lock:
+        return list(_models.keys())
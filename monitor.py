@@ -0,0 +1,290 @@
+# 🚦 Monitor Command Line
+# One command for everything - and it starts FAST!
+#
+#   python monitor.py detect sample.jpg
+#   python monitor.py count sample.jpg
+#   python monitor.py decide sample.jpg --camera lobby
+#   python monitor.py report sample.jpg --provider openai
+#   python monitor.py digest --since 3600 --provider mock
+#   python monitor.py serve --port 8000
+#
+# Each subcommand imports only what it needs, inside the subcommand:
+# `--help` never loads OpenCV or YOLO, and the Gemini/OpenAI SDKs are only
+# loaded when a report is actually requested.
+
+import argparse
+import os
+import sys
+
+DEFAULT_IMAGE = "sample.jpg"
+
+GEMINI_MODELS = ("gemini-2.0-flash", "gemini-1.5-flash", "gemini-1.5-pro", "gemini-pro")
+OPENAI_MODELS = ("gpt-4o", "gpt-4-turbo", "gpt-4", "gpt-3.5-turbo")
+
+
+# ============================================================
+# 🔍 SHARED STEPS
+# ============================================================
+def _read_image(path):
+    import cv2
+
+    if not os.path.exists(path):
+        print(f"❌ Error: Cannot find {path}")
+        sys.exit(1)
+    image = cv2.imread(path)
+    if image is None:
+        print(f"❌ Error: {path} is not an image")
+        sys.exit(1)
+    return image
+
+
+def _detect(path, camera=None, tiled=False):
+    """(detections, zone counts) for one image; zones only when camera is set."""
+    from detections import Detections
+    from model_registry import get_model
+
+    image = _read_image(path)
+    model = get_model()
+    zones = None
+    if camera:
+        from zones import load_zones
+
+        zones = load_zones(camera)
+    if tiled:
+        from tiling import TiledDetector
+
+        detections = TiledDetector().detect(model, image, zones)
+    elif zones:
+        _, detections = zones.detect(model, image)
+    else:
+        detections = Detections.from_result(model(image, verbose=False)[0])
+    zone_counts = zones.zone_counts(detections, image.shape) if zones else {}
+    return detections, zone_counts
+
+
+def _decide(detections, zone_counts):
+    from rules import load_rules
+
+    return load_rules().decide_detections(detections, zone_counts)
+
+
+# ============================================================
+# 🧰 SUBCOMMANDS
+# ============================================================
+def cmd_detect(args):
+    detections, _ = _detect(args.image, tiled=args.tiled)
+    print(f"📊 {len(detections)} detections in {args.image}")
+    for det in detections.to_list():
+        print(f"✓ {det['object']:<15} | Confidence: {det['confidence']}")
+
+
+def cmd_count(args):
+    detections, _ = _detect(args.image, tiled=args.tiled)
+    print(f"👥 People detected: {detections.count('person')}")
+    print(f"📦 Total objects found: {len(detections)}")
+    for name, n in sorted(detections.histogram().items()):
+        print(f"   • {name}: {n}")
+
+
+def cmd_decide(args):
+    detections, zone_counts = _detect(args.image, args.camera, args.tiled)
+    decision = _decide(detections, zone_counts)
+    print(f"👥 People Count: {detections.count('person')}")
+    for zone_name, counts in zone_counts.items():
+        print(f"   🗺️  {zone_name}: {counts.get('person', 0)} people")
+    print(f"📊 Status: {decision['status']}")
+    print(f"🚨 Alert Level: {decision['alert_level']}")
+    print(f"📋 Recommended Action: {decision['action']}")
+
+
+def report_prompt(person_count, decision):
+    return f"""You are a friendly security report writer.
+
+INFORMATION:
+- People detected: {person_count}
+- Status: {decision['status']}
+- Alert Level: {decision['alert_level']}
+- Recommended Action: {decision['action']}
+
+TASK: Write a SHORT, friendly report (exactly 3 sentences) about this situation.
+Write like you're talking to a 10-year-old. Keep it simple and helpful!"""
+
+
+def _providers(args):
+    """Report providers for --provider; the SDK is imported only here."""
+    from report_service import gemini_provider, http_provider, mock_provider, openai_provider
+
+    if args.provider == "mock":
+        return [mock_provider(name) for name in (args.model or ["mock"])]
+
+    if args.provider == "gemini":
+        api_key = os.getenv("GEMINI_API_KEY")
+        if not api_key:
+            print("❌ ERROR: GEMINI_API_KEY not found!")
+            sys.exit(1)
+        import google.generativeai as genai
+
+        genai.configure(api_key=api_key)
+        return [gemini_provider(name) for name in (args.model or GEMINI_MODELS)]
+
+    if args.provider == "openai":
+        api_key = os.getenv("OPENAI_API_KEY")
+        if not api_key:
+            print("❌ ERROR: OPENAI_API_KEY not found!")
+            sys.exit(1)
+        from openai import OpenAI
+
+        client = OpenAI(api_key=api_key)
+        return [openai_provider(client, name, temperature=0.7, max_tokens=200)
+                for name in (args.model or OPENAI_MODELS)]
+
+    if not args.url:
+        print("❌ ERROR: --provider http needs --url")
+        sys.exit(1)
+    return [http_provider(args.url, name) for name in (args.model or ["local"])]
+
+
+def _write_report(args, prompt, inputs=None):
+    """Print the report as it is written (or all at once with --no-stream)."""
+    from report_service import ReportError, ReportService
+
+    service = ReportService(_providers(args))
+    print("-" * 50)
+    try:
+        if args.no_stream:
+            report, used_model = service.generate_sync(prompt, inputs)
+            print(report)
+        else:
+            stream = service.stream(prompt, inputs)
+            for piece in stream:
+                print(piece, end="", flush=True)
+            print()
+            used_model = stream.model
+    except ReportError as e:
+        print(f"\n❌ Could not generate report: {e}")
+        sys.exit(1)
+    print("-" * 50)
+    print(f"🤖 Model Used    : {used_model}")
+
+
+def cmd_report(args):
+    detections, zone_counts = _detect(args.image, args.camera, args.tiled)
+    decision = _decide(detections, zone_counts)
+    person_count = detections.count("person")
+
+    print("=" * 50)
+    print("📊 SECURITY REPORT")
+    print("=" * 50)
+    print(f"👥 People Detected : {person_count}")
+    print(f"📊 Area Status   : {decision['status']}")
+    inputs = {"person_count": person_count, "status": decision["status"],
+              "alert_level": decision["alert_level"], "action": decision["action"]}
+    _write_report(args, report_prompt(person_count, decision), inputs)
+
+
+def cmd_digest(args):
+    import time
+
+    from digest import Digest
+    from event_store import EventStore
+
+    if not args.events:
+        print("❌ ERROR: give --events or set MONITOR_EVENTS")
+        sys.exit(1)
+    now = time.time()
+    start = now - args.since
+    digest = Digest()
+    truncated = False
+    with EventStore(args.events) as store:
+        # Whole hours come from the rollup tables, the partial hours at both
+        # ends from the raw events - so long windows are covered completely
+        first, last = start + (-start) % 3600, now - now % 3600
+        if first < last:
+            digest.add_rollup(store.rollup(start, now))
+            edges = [(start, first - 1e-6), (last, now)]
+        else:
+            edges = [(start, now)]
+        for since, until in edges:
+            rows = store.events(since=since, until=until, limit=args.limit)
+            truncated |= len(rows) == args.limit
+            digest.add_events(rows)
+    if truncated:
+        print(f"⚠️  More than {args.limit} events in a partial hour - only the newest are used")
+    if not len(digest):
+        print(f"📭 No events in the last {args.since:.0f} seconds")
+        return
+
+    print("=" * 50)
+    print(f"🗞️  DIGEST: {len(digest.cameras)} cameras, {len(digest)} decisions")
+    print("=" * 50)
+    # The whole interval is one cached prompt -> one LLM call
+    _write_report(args, digest.prompt(), digest.cache_inputs())
+
+
+def cmd_serve(args):
+    import api_server
+
+    api_server.main(args.server_args)
+
+
+# ============================================================
+# 🚀 MAIN
+# ============================================================
+def build_parser():
+    parser = argparse.ArgumentParser(prog="monitor", description="AI Security Monitor")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    def add_provider_options(sub):
+        sub.add_argument("--provider", choices=("gemini", "openai", "http", "mock"),
+                         default="gemini", help="mock = local fake LLM for testing")
+        sub.add_argument("--model", action="append",
+                         help="model to try (repeat for fallbacks)")
+        sub.add_argument("--url", help="endpoint for --provider http")
+        sub.add_argument("--no-stream", action="store_true",
+                         help="print the report only once it is complete")
+
+    for name, func, help_text in (
+        ("detect", cmd_detect, "list every detected object"),
+        ("count", cmd_count, "count people and objects"),
+        ("decide", cmd_decide, "apply the alert rules"),
+        ("report", cmd_report, "write an AI report about the image"),
+    ):
+        sub = commands.add_parser(name, help=help_text)
+        sub.add_argument("image", nargs="?", default=DEFAULT_IMAGE)
+        sub.add_argument("--tiled", action="store_true",
+                         default=os.getenv("MONITOR_TILING", "").lower() in ("1", "true", "yes"),
+                         help="also detect on zoomed-in tiles (finds small, far-away people)")
+        sub.set_defaults(func=func)
+        if name in ("decide", "report"):
+            sub.add_argument("--camera", default="default",
+                             help="zones to use from the zones file")
+        if name == "report":
+            add_provider_options(sub)
+
+    digest = commands.add_parser("digest", help="one AI report for every camera's recent events")
+    digest.add_argument("--since", type=float, default=3600, help="seconds to look back")
+    digest.add_argument("--events", default=os.getenv("MONITOR_EVENTS"),
+                        help="event store written with MONITOR_EVENTS")
+    digest.add_argument("--limit", type=int, default=100000,
+                        help="most raw events to read per partial hour")
+    add_provider_options(digest)
+    digest.set_defaults(func=cmd_digest)
+
+    # Options after "serve" go straight to api_server.py (see serve --help)
+    serve = commands.add_parser("serve", help="run the detection HTTP API", add_help=False)
+    serve.set_defaults(func=cmd_serve)
+    return parser
+
+
+def main(argv=None):
+    parser = build_parser()
+    args, extra = parser.parse_known_args(argv)
+    if args.command == "serve":
+        args.server_args = extra
+    elif extra:
+        parser.error(f"unrecognized arguments: {' '.join(extra)}")
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
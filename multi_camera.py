@@ -0,0 +1,296 @@
+# 📹 Multi-Camera Scheduler
+# Watch MANY cameras with ONE model!
+#
+# Usage:
+#   python multi_camera.py lobby.mp4 parking.mp4 rtsp://door/stream --fps 5
+#   python multi_camera.py --config cameras.json
+#
+# cameras.json:
+#   [{"id": "lobby", "source": "lobby.mp4", "priority": 2, "fps": 10},
+#    {"id": "parking", "source": "rtsp://...", "priority": 1, "fps": 2}]
+#
+# Each camera has its own reader thread that only keeps the newest frame.
+# The scheduler picks which cameras are due, runs them as one batch on the
+# shared model, and applies the same detection + rules steps as
+# count_people.py and make_decision.py. If the model can't keep up, every
+# camera's frame rate is lowered (by priority) instead of letting delays grow.
+
+import argparse
+import json
+import threading
+import time
+
+import cv2
+
+import metrics
+from alerts import AlertManager
+from detections import Detections
+from event_store import get_event_store
+from model_registry import get_model
+from rules import load_rules
+from stream_monitor import FrameQueue, is_live, open_source
+from tuning import tuned_batch_size
+from zones import load_zones, shift_boxes
+
+
+# ============================================================
+# 📷 ONE CAMERA
+# ============================================================
+class Camera:
+    """One video source plus its scheduling settings and counters."""
+
+    def __init__(self, camera_id, source, priority=1.0, fps=5.0):
+        self.id = camera_id
+        self.source = source
+        self.priority = float(priority)
+        self.target_fps = float(fps)
+        self.effective_fps = float(fps)
+        self.latest = FrameQueue(maxsize=1)  # only the newest frame matters
+        self.next_due = 0.0
+        self.finished = False
+        self.error = None
+
+        self.frames_read = 0
+        self.frames_processed = 0
+        self.total_latency = 0.0
+        self.last_decision = None
+        self.started = time.perf_counter()
+
+    def reader(self, stop):
+        cap = None
+        try:
+            cap = open_source(self.source)
+            # Play files at their own speed, like a real camera would deliver them
+            source_fps = cap.get(cv2.CAP_PROP_FPS) or 0
+            interval = 1.0 / source_fps if source_fps > 0 and not is_live(self.source) else 0
+            next_time = time.perf_counter()
+            while not stop.is_set():
+                ok, frame = cap.read()
+                if not ok:
+                    break
+                self.frames_read += 1
+                self.latest.put((time.perf_counter(), frame))
+                if interval:
+                    next_time += interval
+                    delay = next_time - time.perf_counter()
+                    if delay > 0:
+                        time.sleep(delay)
+        except Exception as e:
+            # One broken camera must not stall the others
+            self.error = str(e)
+            print(f"❌ Camera {self.id}: {e}")
+        finally:
+            if cap is not None:
+                cap.release()
+            self.finished = True
+            self.latest.close()
+
+    def stats(self):
+        elapsed = time.perf_counter() - self.started
+        stats = {
+            "frames_processed": self.frames_processed,
+            "fps": round(self.frames_processed / elapsed, 2) if elapsed > 0 else 0.0,
+            "target_fps": self.target_fps,
+            "effective_fps": round(self.effective_fps, 2),
+            "frames_dropped": self.latest.dropped,
+            "avg_latency_ms": round(self.total_latency / self.frames_processed * 1000, 1)
+            if self.frames_processed else 0.0,
+        }
+        if self.error:
+            stats["error"] = self.error
+        return stats
+
+
+# ============================================================
+# 🗓️ SCHEDULER
+# ============================================================
+class MultiCameraScheduler:
+    """Shares one model fairly between many cameras."""
+
+    def __init__(self, cameras, model=None, batch_size=8, on_result=None, alerts=None):
+        self.cameras = list(cameras)
+        self.model = model or get_model()
+        self.batch_size = batch_size
+        self.on_result = on_result
+        self.engine = load_rules()
+        self._zones = {cam.id: load_zones(cam.id) for cam in self.cameras}
+        self.event_store = get_event_store()
+        # Optional AlertManager: one debounced alert state per camera
+        self.alerts = alerts
+        self._stop = threading.Event()
+        self._frame_time = None  # moving average of seconds per frame
+
+    def stop(self):
+        self._stop.set()
+
+    # ---------- overload handling ----------
+    def _rebalance(self):
+        """Lower per-camera FPS when total demand is above model capacity.
+
+        Capacity is shared in proportion to priority x target FPS, so busy
+        high-priority cameras keep more frames, but every camera keeps some.
+        """
+        if not self._frame_time:
+            return
+        capacity = 1.0 / self._frame_time
+        active = [cam for cam in self.cameras if not cam.finished]
+        demand = sum(cam.target_fps for cam in active)
+        if demand <= capacity:
+            for cam in active:
+                cam.effective_fps = cam.target_fps
+            return
+        weight = sum(cam.priority * cam.target_fps for cam in active)
+        for cam in active:
+            share = capacity * cam.priority * cam.target_fps / weight
+            cam.effective_fps = min(cam.target_fps, share)
+
+    def _pick(self, now):
+        """Cameras that are due, most overdue (weighted by priority) first."""
+        due = [
+            cam for cam in self.cameras
+            if cam.next_due <= now and len(cam.latest)
+        ]
+        due.sort(key=lambda cam: (now - cam.next_due) * cam.priority, reverse=True)
+        return due[: self.batch_size]
+
+    # ---------- one batch ----------
+    def _process(self, batch, now):
+        frames = []
+        for cam in batch:
+            item = cam.latest.get(timeout=0)
+            if item is not None:
+                frames.append((cam, item))
+            cam.next_due = max(cam.next_due, now - 1.0 / cam.effective_fps) + 1.0 / cam.effective_fps
+        if not frames:
+            return
+
+        # Cameras with zones only send the zones' area (like make_decision.py)
+        crops = [
+            self._zones[cam.id].crop(frame) if self._zones.get(cam.id) else (frame, (0, 0))
+            for cam, (_, frame) in frames
+        ]
+        start = time.perf_counter()
+        results = self.model([crop for crop, _ in crops], verbose=False)
+        done = time.perf_counter()
+
+        per_frame = (done - start) / len(frames)
+        self._frame_time = per_frame if self._frame_time is None else 0.8 * self._frame_time + 0.2 * per_frame
+
+        for (cam, (captured, frame)), (_, offset), result in zip(frames, crops, results):
+            metrics.record_model_speed(result)
+            metrics.inc("frames_processed", camera=cam.id)
+            detections = shift_boxes(Detections.from_result(result), offset)
+            zones = self._zones.get(cam.id)
+            zone_counts = zones.zone_counts(detections, frame.shape) if zones else {}
+            decision = self.engine.decide_detections(detections, zone_counts)
+
+            if self.event_store is not None:
+                self.event_store.append_detections(cam.id, detections, decision,
+                                                   zone_counts=zone_counts)
+            if self.alerts is not None:
+                self.alerts.update(cam.id, detections, zone_counts)
+
+            cam.frames_processed += 1
+            cam.total_latency += done - captured
+            cam.last_decision = decision
+            if self.on_result:
+                self.on_result(cam, detections.count("person"), decision)
+
+    def run(self, duration=None):
+        """Run until every source ends, stop() is called or duration seconds."""
+        threads = [
+            threading.Thread(target=cam.reader, args=(self._stop,), daemon=True)
+            for cam in self.cameras
+        ]
+        for thread in threads:
+            thread.start()
+
+        started = time.monotonic()
+        try:
+            while not self._stop.is_set():
+                now = time.monotonic()
+                if duration and now - started >= duration:
+                    break
+                if all(cam.finished and not len(cam.latest) for cam in self.cameras):
+                    break
+
+                self._rebalance()
+                batch = self._pick(now)
+                if batch:
+                    self._process(batch, now)
+                else:
+                    # Sleep until the next camera is due (but stay responsive)
+                    next_due = min((cam.next_due for cam in self.cameras), default=now)
+                    time.sleep(min(max(next_due - now, 0.001), 0.05))
+        finally:
+            self.stop()
+            for thread in threads:
+                thread.join(timeout=2.0)
+
+        return {cam.id: cam.stats() for cam in self.cameras}
+
+
+# ============================================================
+# 🚀 COMMAND LINE
+# ============================================================
+def load_cameras(path):
+    with open(path, encoding="utf-8") as f:
+        config = json.load(f)
+    return [
+        Camera(c["id"], c["source"], c.get("priority", 1.0), c.get("fps", 5.0))
+        for c in config
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Monitor many cameras with one model")
+    parser.add_argument("sources", nargs="*", help="video files, webcam indexes or URLs")
+    parser.add_argument("--config", help="JSON list of cameras")
+    parser.add_argument("--fps", type=float, default=5.0, help="target FPS per camera")
+    parser.add_argument("--batch-size", type=int, default=tuned_batch_size(8),
+                        help="frames per model call (default: from optimize.py profile)")
+    parser.add_argument("--duration", type=float, default=None, help="stop after N seconds")
+    parser.add_argument("--alert-window", type=float, default=10.0,
+                        help="seconds of counts each camera's alert level is based on")
+    parser.add_argument("--alert-stat", default="mean",
+                        help="'mean' or a percentile like 'p90' over the window")
+    args = parser.parse_args()
+
+    if args.config:
+        cameras = load_cameras(args.config)
+    else:
+        cameras = [Camera(f"cam{i}", src, fps=args.fps) for i, src in enumerate(args.sources)]
+    if not cameras:
+        parser.error("give at least one source or --config")
+
+    metrics.start_server_from_env()
+    print("=" * 50)
+    print(f"📹 Monitoring {len(cameras)} cameras")
+    print("=" * 50)
+
+    def show(cam, person_count, decision):
+        print(f"📷 {cam.id:<10} | 👥 {person_count:>3} | {decision['alert_level']}")
+
+    def show_alert(camera_id, event):
+        arrow = "🔺" if event["escalation"] else "🔻"
+        print(f"{arrow} {camera_id:<10} ALERT {event['from']['alert_level']} -> "
+              f"{event['to']['alert_level']} | {event['to']['action']}")
+
+    alerts = AlertManager(show_alert, window=args.alert_window, statistic=args.alert_stat)
+    scheduler = MultiCameraScheduler(cameras, batch_size=args.batch_size, on_result=show,
+                                     alerts=alerts)
+    try:
+        stats = scheduler.run(duration=args.duration)
+    except KeyboardInterrupt:
+        scheduler.stop()
+        stats = {cam.id: cam.stats() for cam in cameras}
+
+    print("\n📊 CAMERA STATS:")
+    print("-" * 50)
+    for camera_id, cam_stats in stats.items():
+        print(f"   {camera_id}: {cam_stats}")
+    print("-" * 50)
+
+
+if __name__ == "__main__":
+    main()
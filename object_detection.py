@@ -1,17 +1,19 @@
 # ✅ STEP 7: Detect Objects Using YOLOv8
 # This is where the AI looks at the image!
 
-from ultralytics import YOLO
 import cv2
 import os
 
+from detections import Detections
+from model_registry import get_model
+
 print("="*50)
 print("🎯 STEP 7: Object Detection with YOLOv8")
 print("="*50)
 
 # Step A: Load the AI model
 print("\n📥 Loading AI model (this takes 10-20 seconds first time)...")
-model = YOLO("yolov8n.pt")
+model = get_model()
 print("✅ Model loaded!")
 
 # Step B: Load your image
@@ -31,13 +33,9 @@ if os.path.exists(image_path):
     print("\n📊 DETECTIONS FOUND:")
     print("-" * 50)
     
-    for detection in results[0].boxes:
-        class_id = int(detection.cls)
-        class_name = results[0].names[class_id]
-        confidence = float(detection.conf)
-        
+    for det in Detections.from_result(results[0]).to_list():
         # Show each detection
-        print(f"✓ {class_name.upper():<15} | Confidence: {confidence*100:.1f}%")
+        print(f"✓ {det['object']:<15} | Confidence: {det['confidence']}")
     
     print("-" * 50)
     
@@ -0,0 +1,308 @@
+# 🏎️ Optimize for This Machine
+# Make the detector as fast as this CPU allows - and save how!
+#
+# Usage:
+#   python optimize.py                              sample.jpg only
+#   python optimize.py --images archive/frames      calibrate on archived frames too
+#   python optimize.py --no-int8                    only tune threads and batch size
+#
+# Steps:
+#   1. INT8: the model is exported to ONNX and quantized with ONNX Runtime,
+#      calibrated on sample.jpg plus the --images folder.
+#   2. Accuracy: INT8 and FP32 run on the same images and their boxes are
+#      matched, so you see how much the INT8 model misses or adds.
+#   3. Tuning: every (model, intra-op threads, inter-op threads, batch size)
+#      combination is timed in a fresh process (thread pools can only be
+#      set up once per process). The counts go to torch and to the ONNX
+#      Runtime / OpenVINO session, whichever the model runs on.
+#   4. The fastest setup is saved to monitor_profile.json, which
+#      model_registry.get_model() applies in every entry point.
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+
+import cv2
+import numpy as np
+
+import tuning
+from backends import available_backends, export_model, load_model, select_backend
+from batch_detection import find_images
+from detections import Detections
+from model_registry import DEFAULT_WEIGHTS
+from tracker import greedy_match, iou_matrix
+
+DEFAULT_IMAGE = "sample.jpg"
+IMGSZ = 640
+
+
+# ============================================================
+# 🖼️ CALIBRATION IMAGES
+# ============================================================
+def calibration_paths(folder=None, limit=64):
+    """sample.jpg plus up to `limit` images from a folder."""
+    paths = [DEFAULT_IMAGE] if os.path.exists(DEFAULT_IMAGE) else []
+    if folder:
+        paths += find_images(folder)[:limit]
+    if not paths:
+        raise FileNotFoundError("No calibration images: add sample.jpg or pass --images")
+    return paths
+
+
+def letterbox(image, size=IMGSZ):
+    """BGR image -> (1, 3, size, size) float32 input, padded like Ultralytics."""
+    h, w = image.shape[:2]
+    scale = size / max(h, w)
+    nh, nw = round(h * scale), round(w * scale)
+    canvas = np.full((size, size, 3), 114, dtype=np.uint8)
+    top, left = (size - nh) // 2, (size - nw) // 2
+    canvas[top:top + nh, left:left + nw] = cv2.resize(image, (nw, nh), interpolation=cv2.INTER_LINEAR)
+    return (canvas[:, :, ::-1].transpose(2, 0, 1)[None] / 255.0).astype(np.float32)
+
+
+# ============================================================
+# 🔢 INT8 QUANTIZATION
+# ============================================================
+def quantize_int8(weights, paths, output=None):
+    """Static INT8 ONNX model calibrated on the given images. Returns its path."""
+    try:
+        import onnxruntime
+        from onnxruntime.quantization import (
+            CalibrationDataReader, QuantFormat, QuantType, quantize_static,
+        )
+    except ImportError:
+        raise RuntimeError("INT8 needs ONNX Runtime: pip install onnx onnxruntime") from None
+
+    onnx_path = export_model(weights, "onnx", imgsz=IMGSZ)
+    output = output or os.path.splitext(onnx_path)[0] + "_int8.onnx"
+    input_name = onnxruntime.InferenceSession(onnx_path).get_inputs()[0].name
+
+    class Images(CalibrationDataReader):
+        def __init__(self):
+            self._paths = iter(paths)
+
+        def get_next(self):
+            for path in self._paths:
+                image = cv2.imread(path)
+                if image is not None:
+                    return {input_name: letterbox(image)}
+            return None
+
+    print(f"🔢 Quantizing {onnx_path} to INT8 on {len(paths)} image(s)...")
+    quantize_static(
+        onnx_path, output, Images(),
+        quant_format=QuantFormat.QDQ,
+        per_channel=True,
+        activation_type=QuantType.QUInt8,
+        weight_type=QuantType.QInt8,
+        # Convolutions carry nearly all the compute; the box decoding at
+        # the end stays in float so coordinates keep their precision
+        op_types_to_quantize=["Conv"],
+    )
+    return output
+
+
+# ============================================================
+# 🎯 ACCURACY CHECK
+# ============================================================
+def compare_models(reference, candidate, paths, iou=0.5):
+    """How well candidate's boxes agree with reference's on the same images.
+
+    recall: share of reference boxes the candidate also found
+    precision: share of candidate boxes the reference also found
+    """
+    matched = found_ref = found_cand = 0
+    people_error = []
+    times = {"reference": [], "candidate": []}
+    for path in paths:
+        image = cv2.imread(path)
+        if image is None:
+            continue
+        dets = {}
+        for name, model in (("reference", reference), ("candidate", candidate)):
+            start = time.perf_counter()
+            dets[name] = Detections.from_result(model(image, verbose=False)[0])
+            times[name].append(time.perf_counter() - start)
+        ref, cand = dets["reference"], dets["candidate"]
+
+        overlap = iou_matrix(ref.xyxy, cand.xyxy)
+        overlap[ref.cls[:, None] != cand.cls[None, :]] = 0
+        rows, _ = greedy_match(overlap, iou)
+        matched += len(rows)
+        found_ref += len(ref)
+        found_cand += len(cand)
+        people_error.append(abs(ref.count("person") - cand.count("person")))
+
+    return {
+        "images": len(people_error),
+        "recall": round(matched / found_ref, 4) if found_ref else 1.0,
+        "precision": round(matched / found_cand, 4) if found_cand else 1.0,
+        "people_count_mae": round(float(np.mean(people_error)), 3) if people_error else 0.0,
+        "reference_ms": round(float(np.median(times["reference"])) * 1000, 1),
+        "candidate_ms": round(float(np.median(times["candidate"])) * 1000, 1),
+    }
+
+
+# ============================================================
+# 🧵 THREAD / BATCH TUNING
+# ============================================================
+def _measure(config):
+    """Runs in a fresh process: images per second for one configuration."""
+    tuning.set_threads(config["intra_op"], config["inter_op"])
+    model = load_model(config["weights"], config["backend"], threads=tuning.current_threads())
+    images = [cv2.imread(p) for p in config["paths"]]
+    images = [image for image in images if image is not None]
+    if not images:
+        raise FileNotFoundError(f"No readable calibration images in {config['paths']}")
+    batch = [images[i % len(images)] for i in range(config["batch_size"])]
+
+    model(batch, verbose=False)  # warm-up
+    done, samples = 0, []
+    end = time.perf_counter() + config["seconds"]
+    while time.perf_counter() < end or not samples:
+        start = time.perf_counter()
+        model(batch, verbose=False)
+        samples.append(time.perf_counter() - start)
+        done += len(batch)
+    return {
+        "images_per_second": round(done / sum(samples), 2),
+        "batch_ms_p50": round(float(np.median(samples)) * 1000, 1),
+    }
+
+
+def measure(config):
+    """_measure() in a new interpreter (thread pools are per process).
+
+    The child runs in the caller's working directory, so relative weights
+    and image paths resolve the same way they do here.
+    """
+    run = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "--measure", json.dumps(config)],
+        capture_output=True, text=True,
+    )
+    if run.returncode != 0:
+        error = run.stderr.strip().splitlines()
+        if error:
+            print(f"   ⚠️  {error[-1]}")
+        return None
+    return json.loads(run.stdout.strip().splitlines()[-1])
+
+
+def thread_options(cpus):
+    return sorted({n for n in (1, 2, 4, cpus // 2, cpus) if 1 <= n <= cpus})
+
+
+def autotune(models, paths, threads, inter_ops, batch_sizes, seconds):
+    """Time every combination; returns all results, fastest first."""
+    results = []
+    for weights, backend in models:
+        for intra_op in threads:
+            # OpenVINO has no inter-op setting - don't time the same thing twice
+            for inter_op in (inter_ops[:1] if backend == "openvino" else inter_ops):
+                for batch_size in batch_sizes:
+                    config = {
+                        "weights": weights, "backend": backend, "intra_op": intra_op,
+                        "inter_op": inter_op, "batch_size": batch_size,
+                        "paths": paths[:8], "seconds": seconds,
+                    }
+                    speed = measure(config)
+                    label = (f"{os.path.basename(weights):<22} {backend:<8} "
+                             f"threads {intra_op:>2}/{inter_op} batch {batch_size:>2}")
+                    if speed is None:
+                        print(f"   ❌ {label} failed")
+                        continue
+                    print(f"   ⏱️  {label} -> {speed['images_per_second']:>7} img/s "
+                          f"({speed['batch_ms_p50']} ms/batch)")
+                    config.pop("paths")
+                    results.append(dict(config, **speed))
+    results.sort(key=lambda r: r["images_per_second"], reverse=True)
+    return results
+
+
+# ============================================================
+# 🚀 COMMAND LINE
+# ============================================================
+def _int_list(text):
+    return [int(x) for x in text.split(",") if x]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Quantize and tune the detector for this machine")
+    parser.add_argument("--weights", default=DEFAULT_WEIGHTS)
+    parser.add_argument("--images", help="folder of archived frames for calibration")
+    parser.add_argument("--no-int8", action="store_true", help="skip INT8 quantization")
+    parser.add_argument("--max-drop", type=float, default=0.05,
+                        help="reject INT8 if recall or precision vs FP32 drops more than this")
+    parser.add_argument("--threads", type=_int_list, default=None,
+                        help="intra-op thread counts to try, e.g. 1,2,4")
+    parser.add_argument("--inter-op", type=_int_list, default=[1, 2])
+    parser.add_argument("--batch-sizes", type=_int_list, default=[1, 4, 8])
+    parser.add_argument("--seconds", type=float, default=3.0, help="timing per combination")
+    parser.add_argument("-o", "--output", default=None, help="profile path")
+    parser.add_argument("--measure", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.measure:
+        print(json.dumps(_measure(json.loads(args.measure))))
+        return
+
+    print("=" * 50)
+    print("🏎️  Optimizing AI Security Monitor for this machine")
+    print("=" * 50)
+    cpus = os.cpu_count() or 1
+    paths = calibration_paths(args.images)
+    print(f"🖼️  {len(paths)} calibration image(s), {cpus} CPU(s), backends: {available_backends()}")
+
+    baseline = (args.weights, select_backend("cpu"))
+    candidates = [baseline]
+    int8 = None
+    if not args.no_int8:
+        try:
+            int8_path = os.path.abspath(quantize_int8(args.weights, paths))
+        except RuntimeError as e:
+            print(f"⚠️  {e}")
+        else:
+            print("🎯 Comparing INT8 with FP32...")
+            accuracy = compare_models(load_model(args.weights, "torch"),
+                                      load_model(int8_path, "onnx"), paths)
+            accepted = min(accuracy["recall"], accuracy["precision"]) >= 1 - args.max_drop
+            int8 = {"path": int8_path, "accuracy": accuracy, "accepted": accepted}
+            print(f"   recall {accuracy['recall']:.1%} | precision {accuracy['precision']:.1%}"
+                  f" | people count error {accuracy['people_count_mae']}"
+                  f" | {accuracy['reference_ms']} ms -> {accuracy['candidate_ms']} ms")
+            print("   ✅ INT8 accepted" if accepted else
+                  f"   ❌ INT8 rejected (more than {args.max_drop:.0%} drop)")
+            if accepted:
+                candidates.append((int8_path, "onnx"))
+
+    print("🧵 Tuning threads and batch size...")
+    results = autotune(candidates, paths, args.threads or thread_options(cpus),
+                       args.inter_op, args.batch_sizes, args.seconds)
+    if not results:
+        print("❌ Every configuration failed - no profile written")
+        sys.exit(1)
+    best = results[0]
+
+    profile = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "host": {"machine": platform.machine(), "cpus": cpus},
+        "model": {"weights": best["weights"], "backend": best["backend"]},
+        "threads": {"intra_op": best["intra_op"], "inter_op": best["inter_op"]},
+        "batch_size": best["batch_size"],
+        "int8": int8,
+        "results": results,
+    }
+    path = tuning.save_profile(profile, args.output)
+    print("\n" + "=" * 50)
+    print(f"🏆 {os.path.basename(best['weights'])} ({best['backend']}), "
+          f"{best['intra_op']}/{best['inter_op']} threads, batch {best['batch_size']}: "
+          f"{best['images_per_second']} img/s")
+    print(f"💾 Saved profile to {path}")
+
+
+if __name__ == "__main__":
+    main()
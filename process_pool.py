@@ -0,0 +1,284 @@
+# 🧵 Process Pool Inference
+# Use ALL the CPU cores: K worker processes, each with its own model!
+#
+#   with InferencePool(workers=8) as pool:
+#       future = pool.submit(image)          # returns right away
+#       detections = future.result()         # a Detections object
+#
+# Images go to the workers through shared memory slots instead of being
+# pickled, so a 4K frame is copied once (into the slot) rather than
+# serialized, sent through a pipe and deserialized. Only the small result
+# arrays travel back through a queue. Slots live in /dev/shm: lower
+# MONITOR_POOL_SLOTS / MONITOR_POOL_SLOT_MB where it is small (Docker).
+#
+# If a worker dies (or can't load its model) every waiting future fails
+# with an error instead of hanging, and get_pool() starts a fresh pool.
+
+import os
+import queue
+import threading
+from concurrent.futures import Future
+from multiprocessing import get_context, shared_memory
+
+import numpy as np
+
+# Only light imports here: spawned workers import this module before they
+# get a chance to limit torch's threads.
+from detections import Detections
+
+# Room for a 4K BGR frame; bigger images fall back to pickling
+DEFAULT_SLOT_BYTES = 3840 * 2160 * 3
+SHM_DIR = "/dev/shm"
+
+
+def _check_shared_memory(total):
+    """Fail with a clear message instead of a SIGBUS when /dev/shm is too small."""
+    if not os.path.isdir(SHM_DIR):
+        return  # not Linux - shared memory isn't a size-limited tmpfs
+    stat = os.statvfs(SHM_DIR)
+    free = stat.f_bavail * stat.f_frsize
+    if total > free:
+        raise RuntimeError(
+            f"Image slots need {total / 1e6:.0f} MB of shared memory but {SHM_DIR} has "
+            f"{free / 1e6:.0f} MB free. Set {SLOTS_ENV} / {SLOT_MB_ENV} lower (0 slots "
+            "pickles every image) or enlarge it (e.g. docker run --shm-size=1g)."
+        )
+
+
+# ============================================================
+# 👷 WORKER PROCESS
+# ============================================================
+def _worker(worker_id, weights, threads, slot_names, tasks, results):
+    # Limit threads BEFORE torch is imported so K workers don't fight over cores
+    for var in ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS"):
+        os.environ[var] = str(threads)
+    try:
+        import tuning
+        # Also caps the ONNX Runtime / OpenVINO session the registry loads
+        tuning.set_threads(threads, 1)
+        tuning.activate(threads=False)  # keep our per-worker thread count
+        from model_registry import get_model
+        model = get_model(weights) if weights else get_model()
+    except Exception as e:
+        results.put(("failed", worker_id, repr(e)))
+        return
+
+    slots = [shared_memory.SharedMemory(name=name) for name in slot_names]
+    results.put(("ready", worker_id, model.names))
+
+    try:
+        while True:
+            task = tasks.get()
+            if task is None:
+                break
+            job_id, slot, shape, image = task
+            if slot is not None:
+                image = np.ndarray(shape, dtype=np.uint8, buffer=slots[slot].buf)
+            try:
+                result = model(image, verbose=False)[0]
+                det = Detections.from_result(result)
+                results.put(("done", job_id, slot, (det.xyxy, det.conf, det.cls)))
+            except Exception as e:
+                results.put(("error", job_id, slot, repr(e)))
+    finally:
+        for shm in slots:
+            shm.close()
+
+
+# ============================================================
+# 🏊 POOL FRONT END
+# ============================================================
+class InferencePool:
+    """K model processes fed through shared-memory image slots."""
+
+    def __init__(self, workers=None, weights=None, threads_per_worker=None,
+                 slots=None, slot_bytes=DEFAULT_SLOT_BYTES, timeout=60.0):
+        cpus = os.cpu_count() or 1
+        self.workers = workers or max(1, cpus // 2)
+        threads = threads_per_worker or max(1, cpus // self.workers)
+        self.slot_bytes = slot_bytes
+        self.timeout = timeout  # longest wait for a slot or a result
+        self.error = None  # why the pool stopped working, if it did
+
+        # Two slots per worker: one being processed, one being filled
+        count = self.workers * 2 if slots is None else slots
+        if count and slot_bytes:
+            _check_shared_memory(count * slot_bytes)
+        else:
+            count = 0
+        self._slots = [shared_memory.SharedMemory(create=True, size=slot_bytes) for _ in range(count)]
+        self._free = queue.Queue()
+        for i in range(count):
+            self._free.put(i)
+
+        ctx = get_context("spawn")  # fresh interpreters - no forked torch threads
+        self._tasks = ctx.Queue()
+        self._results = ctx.Queue()
+        self._processes = [
+            ctx.Process(
+                target=_worker,
+                args=(i, weights, threads, [s.name for s in self._slots],
+                      self._tasks, self._results),
+                daemon=True,
+            )
+            for i in range(self.workers)
+        ]
+        for process in self._processes:
+            process.start()
+
+        self.names = None
+        self._ready = threading.Event()
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._next_id = 0
+        self._closed = False
+        self._collector = threading.Thread(target=self._collect, daemon=True)
+        self._collector.start()
+
+    @property
+    def broken(self):
+        return self.error is not None
+
+    def _fail_all(self, error):
+        """Stop the pool: every waiting and future submit() gets the error."""
+        self.error = error
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        for future in pending.values():
+            future.set_exception(RuntimeError(error))
+        self._ready.set()  # don't leave wait_ready() hanging
+
+    def _collect(self):
+        failed = 0
+        while True:
+            try:
+                message = self._results.get(timeout=1.0)
+            except queue.Empty:
+                # A worker that crashed (e.g. out of memory) never answers its
+                # job, so fail everything rather than wait forever
+                dead = [p for p in self._processes if not p.is_alive()]
+                if dead and not self._closed and not self.broken:
+                    self._fail_all(f"worker process died (exit code {dead[0].exitcode})")
+                continue
+            if message is None:
+                break
+            kind, job_id = message[0], message[1]
+            if kind == "ready":
+                self.names = message[2]
+                self._ready.set()
+                continue
+            if kind == "failed":
+                failed += 1
+                if failed == len(self._processes):
+                    self._fail_all(f"no worker could load the model: {message[2]}")
+                continue
+
+            _, _, slot, payload = message
+            if slot is not None:
+                self._free.put(slot)
+            with self._lock:
+                future = self._pending.pop(job_id, None)
+            if future is None:
+                continue
+            if kind == "error":
+                future.set_exception(RuntimeError(f"worker failed: {payload}"))
+            else:
+                xyxy, conf, cls = payload
+                future.set_result(Detections(xyxy, conf, cls, self.names))
+
+    def submit(self, image):
+        """Queue one BGR image. Returns a Future that resolves to Detections."""
+        if self._closed:
+            raise RuntimeError("pool is closed")
+        if self.broken:
+            raise RuntimeError(self.error)
+        image = np.ascontiguousarray(image, dtype=np.uint8)
+        future = Future()
+        with self._lock:
+            job_id = self._next_id
+            self._next_id += 1
+            self._pending[job_id] = future
+
+        if self._slots and image.nbytes <= self.slot_bytes:
+            try:
+                # Blocks when every slot is busy (back-pressure)
+                slot = self._free.get(timeout=self.timeout)
+            except queue.Empty:
+                with self._lock:
+                    self._pending.pop(job_id, None)
+                raise RuntimeError(self.error or "no free image slot - workers stuck?") from None
+            view = np.ndarray(image.shape, dtype=np.uint8, buffer=self._slots[slot].buf)
+            view[...] = image
+            self._tasks.put((job_id, slot, image.shape, None))
+        else:
+            self._tasks.put((job_id, None, image.shape, image))
+        return future
+
+    def map(self, images):
+        """Detections for each image, in order, with a bounded number in flight."""
+        in_flight = []
+        for image in images:
+            in_flight.append(self.submit(image))
+            if len(in_flight) >= len(self._slots):
+                yield in_flight.pop(0).result(timeout=self.timeout)
+        for future in in_flight:
+            yield future.result(timeout=self.timeout)
+
+    def wait_ready(self, timeout=None):
+        """Block until at least one worker has loaded its model."""
+        return self._ready.wait(timeout)
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        for _ in self._processes:
+            self._tasks.put(None)
+        for process in self._processes:
+            process.join(timeout=10)
+        self._results.put(None)
+        self._collector.join(timeout=2)
+        for shm in self._slots:
+            shm.close()
+            shm.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+# ============================================================
+# 🔗 SHARED POOL
+# ============================================================
+_pool = None
+_pool_lock = threading.Lock()
+
+# Set MONITOR_WORKERS=8 to run inference in 8 processes
+WORKERS_ENV = "MONITOR_WORKERS"
+# Shared-memory image slots (default: 2 per worker, each big enough for 4K).
+# Lower them where /dev/shm is small, e.g. Docker's default 64 MB.
+SLOTS_ENV = "MONITOR_POOL_SLOTS"
+SLOT_MB_ENV = "MONITOR_POOL_SLOT_MB"
+
+
+def get_pool(workers=None, slots=None, slot_bytes=None):
+    """Process-wide pool, created on first use (None if MONITOR_WORKERS is unset)."""
+    global _pool
+    workers = workers or int(os.getenv(WORKERS_ENV, "0"))
+    if workers <= 0:
+        return None
+    if slots is None and os.getenv(SLOTS_ENV):
+        slots = int(os.getenv(SLOTS_ENV))
+    if slot_bytes is None:
+        slot_mb = os.getenv(SLOT_MB_ENV)
+        slot_bytes = int(float(slot_mb) * 1024 * 1024) if slot_mb else DEFAULT_SLOT_BYTES
+    with _pool_lock:
+        if _pool is not None and _pool.broken:
+            print(f"⚠️  Restarting inference pool: {_pool.error}")
+            _pool.close()
+            _pool = None
+        if _pool is None:
+            _pool = InferencePool(workers, slots=slots, slot_bytes=slot_bytes)
+        return _pool
@@ -0,0 +1,110 @@
+# 🎨 Fast Box Renderer
+# Draw detection boxes quickly, without making a new image every frame!
+#
+#   renderer = Renderer()
+#   annotated = renderer.draw(image, detections, only=("person",))
+#   jpeg = renderer.encode_jpeg(annotated, quality=80)
+#
+# - boxes are drawn on one reusable buffer (or straight onto the frame)
+# - each class label is rendered to a tiny image ONCE, then just pasted
+# - JPEG output goes to the browser (app.py) or an MJPEG stream
+#   (api_server.py --camera, /stream/NAME)
+
+import functools
+
+import cv2
+import numpy as np
+
+FONT = cv2.FONT_HERSHEY_SIMPLEX
+
+
+@functools.lru_cache(maxsize=None)
+def class_color(class_id):
+    """Stable, bright BGR color per class id."""
+    hue = (class_id * 47) % 180
+    hsv = np.uint8([[[hue, 200, 255]]])
+    return tuple(int(c) for c in cv2.cvtColor(hsv, cv2.COLOR_HSV2BGR)[0, 0])
+
+
+class Renderer:
+    """Draws boxes and labels with cached label images."""
+
+    def __init__(self, thickness=2, font_scale=0.5):
+        self.thickness = thickness
+        self.font_scale = font_scale
+        self._labels = {}  # (name, class id) -> label image
+        self._buffer = None
+
+    def _label(self, name, class_id):
+        key = (name, class_id)
+        label = self._labels.get(key)
+        if label is None:
+            (w, h), base = cv2.getTextSize(name, FONT, self.font_scale, 1)
+            label = np.empty((h + base + 4, w + 4, 3), dtype=np.uint8)
+            label[:] = class_color(class_id)
+            cv2.putText(label, name, (2, h + 2), FONT, self.font_scale,
+                        (255, 255, 255), 1, cv2.LINE_AA)
+            self._labels[key] = label
+        return label
+
+    def _target(self, image, in_place):
+        if in_place:
+            return image
+        if self._buffer is None or self._buffer.shape != image.shape:
+            self._buffer = np.empty_like(image)
+        np.copyto(self._buffer, image)
+        return self._buffer
+
+    def draw(self, image, detections, only=None, keep=None, in_place=False):
+        """Draw boxes onto image (or a reused copy of it) and return it.
+
+        only: class names to draw, e.g. ("person",)
+        keep: boolean mask of boxes to draw, e.g. people inside alerting zones
+        The returned buffer is reused by the next draw() call.
+        """
+        canvas = self._target(image, in_place)
+        mask = np.ones(len(detections), dtype=bool) if keep is None else np.asarray(keep, dtype=bool)
+        if only is not None:
+            wanted = np.zeros(len(detections), dtype=bool)
+            for name in only:
+                wanted |= detections.mask(name)
+            mask &= wanted
+
+        h, w = canvas.shape[:2]
+        boxes = detections.xyxy[mask].round().astype(np.int32)
+        classes = detections.cls[mask].tolist()
+        for (x1, y1, x2, y2), class_id in zip(boxes.tolist(), classes):
+            color = class_color(class_id)
+            cv2.rectangle(canvas, (x1, y1), (x2, y2), color, self.thickness)
+
+            label = self._label(detections.names.get(class_id, str(class_id)), class_id)
+            lh, lw = label.shape[:2]
+            # Above the box if there is room, otherwise inside its top edge
+            top = y1 - lh if y1 - lh >= 0 else max(y1, 0)
+            left = min(max(x1, 0), w - 1)
+            bottom, right = min(top + lh, h), min(left + lw, w)
+            if bottom > top and right > left:
+                canvas[top:bottom, left:right] = label[: bottom - top, : right - left]
+        return canvas
+
+    @staticmethod
+    def encode_jpeg(image, quality=80):
+        """BGR image -> JPEG bytes."""
+        ok, data = cv2.imencode(".jpg", image, [cv2.IMWRITE_JPEG_QUALITY, int(quality)])
+        if not ok:
+            raise ValueError("JPEG encoding failed")
+        return data.tobytes()
+
+
+MJPEG_BOUNDARY = "frame"
+MJPEG_CONTENT_TYPE = f"multipart/x-mixed-replace; boundary={MJPEG_BOUNDARY}"
+
+
+def mjpeg_part(jpeg):
+    """Wrap JPEG bytes as one part of an MJPEG (multipart) HTTP stream."""
+    header = (
+        f"--{MJPEG_BOUNDARY}\r\n"
+        f"Content-Type: image/jpeg\r\n"
+        f"Content-Length: {len(jpeg)}\r\n\r\n"
+    ).encode("ascii")
+    return header + jpeg + b"\r\n"
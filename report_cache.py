@@ -0,0 +1,151 @@
+# 💾 Report Cache
+# Don't pay an LLM to write the same report twice!
+#
+# The report prompt only depends on a few values (people count, status,
+# alert level, action), so the same situation always gets the same key.
+# Entries live in a small in-memory LRU and, optionally, a SQLite file
+# that survives restarts and is shared by every process on the machine.
+
+import collections
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+import metrics
+
+# Set MONITOR_REPORT_CACHE=/path/to/reports.sqlite to turn on the disk tier
+CACHE_ENV = "MONITOR_REPORT_CACHE"
+
+
+def make_key(inputs, model_name):
+    """Stable key from the prompt inputs and the model that wrote the report."""
+    normalized = {
+        str(k): v.strip() if isinstance(v, str) else v
+        for k, v in inputs.items()
+    }
+    payload = json.dumps([model_name, normalized], sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ReportCache:
+    """LRU + TTL cache for generated reports, with an optional SQLite tier."""
+
+    def __init__(self, max_size=256, ttl=3600, db_path=None):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._memory = collections.OrderedDict()  # key -> (expires, report)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self._db = None
+        if db_path:
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS reports ("
+                " key TEXT PRIMARY KEY, report TEXT NOT NULL, expires REAL NOT NULL)"
+            )
+            self._db.commit()
+
+    # ---------- lookups ----------
+    def _lookup(self, key, now):
+        """Return (report, from_disk) or (None, False). Caller holds the lock."""
+        entry = self._memory.get(key)
+        if entry is not None:
+            expires, report = entry
+            if expires > now:
+                self._memory.move_to_end(key)
+                return report, False
+            del self._memory[key]
+            self.evictions += 1
+
+        if self._db is not None:
+            row = self._db.execute(
+                "SELECT report, expires FROM reports WHERE key = ? AND expires > ?",
+                (key, now),
+            ).fetchone()
+            if row is not None:
+                self._remember(key, row[0], row[1])
+                return row[0], True
+
+        return None, False
+
+    def get_any(self, inputs, model_names):
+        """First cached report among a fallback list. Returns (report, model)."""
+        now = time.time()
+        with self._lock:
+            for model_name in model_names:
+                report, from_disk = self._lookup(make_key(inputs, model_name), now)
+                if report is not None:
+                    self.hits += 1
+                    self.disk_hits += from_disk
+                    metrics.inc("report_cache_hits")
+                    return report, model_name
+            self.misses += 1
+            metrics.inc("report_cache_misses")
+            return None, None
+
+    def get(self, inputs, model_name):
+        """Return the cached report, or None."""
+        return self.get_any(inputs, [model_name])[0]
+
+    # ---------- storing ----------
+    def _remember(self, key, report, expires):
+        self._memory[key] = (expires, report)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_size:
+            self._memory.popitem(last=False)
+            self.evictions += 1
+
+    def put(self, inputs, model_name, report):
+        key = make_key(inputs, model_name)
+        expires = time.time() + self.ttl
+        with self._lock:
+            self._remember(key, report, expires)
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO reports (key, report, expires) VALUES (?, ?, ?)",
+                    (key, report, expires),
+                )
+                self._db.execute("DELETE FROM reports WHERE expires <= ?", (time.time(),))
+                self._db.commit()
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM reports")
+                self._db.commit()
+
+    # ---------- stats ----------
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "size": len(self._memory),
+            "hit_rate": round(self.hits / total, 3) if total else 0.0,
+        }
+
+
+# ============================================================
+# 🔗 SHARED CACHE
+# ============================================================
+_shared = None
+_shared_lock = threading.Lock()
+
+
+def get_report_cache():
+    """The process-wide report cache (disk tier if MONITOR_REPORT_CACHE is set)."""
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            _shared = ReportCache(db_path=os.getenv(CACHE_ENV))
+        return _shared
@@ -0,0 +1,427 @@
+# 📝 Report Service
+# Ask several LLMs for a report WITHOUT waiting on them one by one!
+#
+# - Every provider gets its own timeout.
+# - Hedging: if the first model hasn't answered after hedge_delay seconds,
+#   the next one is started too, and whichever answers first wins.
+# - A circuit breaker skips providers that keep failing, for a while.
+#   Errors caused by the request itself (bad API key, no access) don't
+#   count - the provider is fine, the caller isn't.
+# - Reports go through the shared report cache from report_cache.py.
+# - stream() hands out the text piece by piece as the model writes it, so
+#   the first words show up long before the whole report is done.
+
+import asyncio
+import functools
+import json
+import queue
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+import metrics
+from report_cache import get_report_cache
+
+
+class ReportError(Exception):
+    """No provider could write the report."""
+
+    def __init__(self, errors):
+        self.errors = errors  # [(model_name, error message), ...]
+        summary = "; ".join(f"{name}: {err}" for name, err in errors) or "no providers available"
+        super().__init__(f"Could not generate report ({summary})")
+
+
+# The LLM SDKs are blocking, so they run in these threads. A losing hedged
+# call can't be interrupted; keeping it off asyncio's default executor means
+# asyncio.run() doesn't wait for it before returning the winner.
+_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="report")
+
+
+async def _in_thread(func, *args, **kwargs):
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_executor, functools.partial(func, *args, **kwargs))
+
+
+# HTTP statuses that blame the request, not the provider
+CALLER_ERRORS = {400, 401, 403}
+
+
+def is_caller_error(error):
+    """Bad key / no permission / bad request (Google, OpenAI and urllib errors)."""
+    status = getattr(error, "status_code", None) or getattr(error, "code", None)
+    return isinstance(status, int) and status in CALLER_ERRORS
+
+
+# ============================================================
+# 🔌 CIRCUIT BREAKER
+# ============================================================
+class CircuitBreaker:
+    """Stops calling a provider after repeated failures.
+
+    After `max_failures` failures in a row the circuit "opens" and the
+    provider is skipped. Once `reset_after` seconds have passed one trial
+    call is let through; success closes the circuit again.
+    """
+
+    def __init__(self, max_failures=3, reset_after=60.0):
+        self.max_failures = max_failures
+        self.reset_after = reset_after
+        self.failures = 0
+        self.opened_at = None
+
+    @property
+    def is_open(self):
+        if self.opened_at is None:
+            return False
+        if time.monotonic() - self.opened_at >= self.reset_after:
+            return False  # half-open: allow one trial call
+        return True
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+
+    def record_failure(self):
+        self.failures += 1
+        if self.failures >= self.max_failures:
+            self.opened_at = time.monotonic()
+
+
+# ============================================================
+# 🤖 PROVIDERS
+# ============================================================
+class Provider:
+    """One model we can ask for a report.
+
+    generate is an async function taking the prompt and returning the text.
+    stream (optional) is a blocking function taking the prompt and
+    yielding the text in pieces.
+    """
+
+    def __init__(self, name, generate, timeout=15.0, stream=None):
+        self.name = name
+        self.generate = generate
+        self.timeout = timeout
+        self.stream = stream
+        self.breaker = CircuitBreaker()
+
+
+def gemini_provider(model_name, timeout=15.0):
+    """Provider for the google-generativeai SDK (call genai.configure first)."""
+    import google.generativeai as genai
+
+    async def generate(prompt):
+        model = genai.GenerativeModel(model_name)
+        response = await _in_thread(model.generate_content, prompt)
+        return response.text
+
+    def stream(prompt):
+        model = genai.GenerativeModel(model_name)
+        for chunk in model.generate_content(prompt, stream=True):
+            yield chunk.text
+
+    return Provider(model_name, generate, timeout, stream)
+
+
+def openai_provider(client, model_name, timeout=15.0, **options):
+    """Provider for an openai.OpenAI client."""
+
+    async def generate(prompt):
+        response = await _in_thread(
+            client.chat.completions.create,
+            model=model_name,
+            messages=[{"role": "user", "content": prompt}],
+            **options,
+        )
+        return response.choices[0].message.content
+
+    def stream(prompt):
+        response = client.chat.completions.create(
+            model=model_name,
+            messages=[{"role": "user", "content": prompt}],
+            stream=True,
+            **options,
+        )
+        for chunk in response:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+
+    return Provider(model_name, generate, timeout, stream)
+
+
+def http_provider(url, model_name, timeout=15.0):
+    """Provider for a plain JSON endpoint (handy for a local stub server).
+
+    Sends {"model": ..., "prompt": ...} and expects {"text": ...} back.
+    When streaming, "stream": true is added and one {"text": ...} JSON
+    object per line is expected.
+    """
+
+    def request(prompt, stream=False):
+        body = {"model": model_name, "prompt": prompt}
+        if stream:
+            body["stream"] = True
+        return urllib.request.Request(
+            url, data=json.dumps(body).encode("utf-8"),
+            headers={"Content-Type": "application/json"},
+        )
+
+    def post(prompt):
+        with urllib.request.urlopen(request(prompt), timeout=timeout) as response:
+            return json.loads(response.read().decode("utf-8"))["text"]
+
+    async def generate(prompt):
+        return await _in_thread(post, prompt)
+
+    def stream(prompt):
+        with urllib.request.urlopen(request(prompt, stream=True), timeout=timeout) as response:
+            for line in response:
+                if line.strip():
+                    yield json.loads(line.decode("utf-8"))["text"]
+
+    return Provider(model_name, generate, timeout, stream)
+
+
+def mock_provider(name="mock", text=None, first_delay=0.3, word_delay=0.03,
+                  fail=False, timeout=15.0):
+    """Local fake LLM for tests and demos - no network, no API key.
+
+    Answers with `text` (or a short canned report) one word at a time,
+    after first_delay seconds. fail=True makes every call raise.
+    """
+
+    def answer(prompt):
+        if text is not None:
+            return text
+        lines = prompt.count("\n") + 1
+        return (f"[{name}] Mock report for a {lines}-line prompt. "
+                "Everything is under control. No action is needed right now.")
+
+    def stream(prompt):
+        time.sleep(first_delay)
+        if fail:
+            raise RuntimeError(f"{name} failed (mock)")
+        words = answer(prompt).split(" ")
+        for i, word in enumerate(words):
+            if i:
+                time.sleep(word_delay)
+            yield word if i == len(words) - 1 else word + " "
+
+    async def generate(prompt):
+        return "".join(await _in_thread(lambda: list(stream(prompt))))
+
+    return Provider(name, generate, timeout, stream)
+
+
+# ============================================================
+# ⚡ HEDGED REPORT SERVICE
+# ============================================================
+class ReportService:
+    """Runs the provider fallback chain with timeouts and hedging."""
+
+    def __init__(self, providers, hedge_delay=2.0, cache=None):
+        self.providers = list(providers)
+        self.hedge_delay = hedge_delay
+        self.cache = cache if cache is not None else get_report_cache()
+
+    async def _call(self, provider, prompt):
+        with metrics.stage("llm"):
+            return await asyncio.wait_for(provider.generate(prompt), provider.timeout)
+
+    async def generate(self, prompt, cache_inputs=None):
+        """Return (report, model_name). Raises ReportError if every provider fails."""
+        names = [p.name for p in self.providers]
+        if cache_inputs is not None:
+            report, model_name = self.cache.get_any(cache_inputs, names)
+            if report is not None:
+                return report, model_name
+
+        waiting = [p for p in self.providers if not p.breaker.is_open]
+        errors = [(p.name, "circuit open") for p in self.providers if p.breaker.is_open]
+        running = {}
+
+        def launch_next():
+            if waiting:
+                provider = waiting.pop(0)
+                task = asyncio.ensure_future(self._call(provider, prompt))
+                running[task] = provider
+
+        launch_next()
+        try:
+            while running:
+                done, _ = await asyncio.wait(
+                    running,
+                    timeout=self.hedge_delay if waiting else None,
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
+                if not done:
+                    # Slow answer - hedge by starting the next provider too
+                    launch_next()
+                    continue
+
+                for task in done:
+                    provider = running.pop(task)
+                    try:
+                        report = task.result()
+                    except asyncio.TimeoutError:
+                        provider.breaker.record_failure()
+                        metrics.inc("llm_failures", model=provider.name)
+                        errors.append((provider.name, "timed out"))
+                    except Exception as e:
+                        if not is_caller_error(e):
+                            provider.breaker.record_failure()
+                        metrics.inc("llm_failures", model=provider.name)
+                        errors.append((provider.name, str(e)[:100]))
+                    else:
+                        provider.breaker.record_success()
+                        if cache_inputs is not None:
+                            self.cache.put(cache_inputs, provider.name, report)
+                        return report, provider.name
+
+                # A failure means we should not wait for the hedge timer
+                if not running:
+                    launch_next()
+        finally:
+            for task in running:
+                task.cancel()
+
+        raise ReportError(errors)
+
+    def generate_sync(self, prompt, cache_inputs=None):
+        """Blocking wrapper for scripts that aren't async."""
+        return asyncio.run(self.generate(prompt, cache_inputs))
+
+    def stream(self, prompt, cache_inputs=None):
+        """Like generate_sync(), but as a ReportStream of text pieces."""
+        return ReportStream(self, prompt, cache_inputs)
+
+
+# ============================================================
+# 🌊 STREAMING
+# ============================================================
+_DONE = object()
+
+
+def _pieces(provider, prompt):
+    """The provider's stream, or its whole answer as one piece."""
+    if provider.stream is not None:
+        return provider.stream(prompt)
+    return [asyncio.run(provider.generate(prompt))]
+
+
+class ReportStream:
+    """Iterate over it to get the report as it is written.
+
+    Hedging works on the FIRST piece: if nothing has arrived after
+    hedge_delay seconds the next provider is started too, and the first one
+    to send text wins. .text is the report written so far (the whole report
+    once the loop ends) and .model the provider writing it. Raises
+    ReportError if every provider fails (or the winner fails halfway).
+    """
+
+    def __init__(self, service, prompt, cache_inputs=None):
+        self.service = service
+        self.prompt = prompt
+        self.cache_inputs = cache_inputs
+        self.text = ""
+        self.model = None
+        self.first_piece_seconds = None
+
+    def __iter__(self):
+        return self._run()
+
+    def _fail(self, provider, errors, message, error=None):
+        if not is_caller_error(error):
+            provider.breaker.record_failure()
+        metrics.inc("llm_failures", model=provider.name)
+        errors.append((provider.name, message))
+
+    def _run(self):
+        service = self.service
+        if self.cache_inputs is not None:
+            report, model_name = service.cache.get_any(
+                self.cache_inputs, [p.name for p in service.providers]
+            )
+            if report is not None:
+                self.text, self.model, self.first_piece_seconds = report, model_name, 0.0
+                yield report
+                return
+
+        waiting = [p for p in service.providers if not p.breaker.is_open]
+        errors = [(p.name, "circuit open") for p in service.providers if p.breaker.is_open]
+        pieces = queue.Queue()
+        running = {}  # provider -> deadline for its first piece
+        start = time.perf_counter()
+
+        def pump(provider):
+            try:
+                for piece in _pieces(provider, self.prompt):
+                    if piece:
+                        pieces.put((provider, piece))
+                pieces.put((provider, _DONE))
+            except Exception as e:
+                pieces.put((provider, e))
+
+        def launch_next():
+            if waiting:
+                provider = waiting.pop(0)
+                running[provider] = time.monotonic() + provider.timeout
+                _executor.submit(pump, provider)
+
+        winner, parts = None, []
+        launch_next()
+        while True:
+            if winner is None:
+                if not running and not waiting:
+                    raise ReportError(errors)
+                if not running:
+                    launch_next()
+                    continue
+                until_deadline = min(running.values()) - time.monotonic()
+                wait = min(service.hedge_delay, until_deadline) if waiting else until_deadline
+            else:
+                wait = winner.timeout  # longest pause allowed between pieces
+
+            try:
+                provider, item = pieces.get(timeout=max(wait, 0.001))
+            except queue.Empty:
+                if winner is not None:
+                    self._fail(winner, errors, "stream stalled")
+                    raise ReportError(errors)
+                now = time.monotonic()
+                for late in [p for p, deadline in running.items() if deadline <= now]:
+                    del running[late]
+                    self._fail(late, errors, "timed out")
+                # Slow first piece - hedge by starting the next provider too
+                launch_next()
+                continue
+
+            if provider not in running:
+                continue  # a provider that already lost or timed out
+            if isinstance(item, Exception) or (item is _DONE and winner is None):
+                del running[provider]
+                if item is _DONE:
+                    self._fail(provider, errors, "empty answer")
+                else:
+                    self._fail(provider, errors, str(item)[:100], item)
+                if provider is winner:
+                    raise ReportError(errors)
+                continue
+            if item is _DONE:
+                provider.breaker.record_success()
+                metrics.observe("llm", time.perf_counter() - start)
+                self.text = "".join(parts)
+                if self.cache_inputs is not None:
+                    service.cache.put(self.cache_inputs, provider.name, self.text)
+                return
+
+            if winner is None:
+                winner = provider
+                self.model = provider.name
+                self.first_piece_seconds = time.perf_counter() - start
+                metrics.observe("llm_first_piece", self.first_piece_seconds)
+                running = {winner: running[winner]}  # the others lost the race
+            parts.append(item)
+            self.text += item
+            yield item
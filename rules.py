@@ -0,0 +1,181 @@
+# 🤖 Decision Rules Engine
+# The "thinking" part of the monitor, loaded from rules.json instead of
+# being copy-pasted into every script!
+#
+# A rule matches when ALL of its conditions are true. Rules are checked in
+# order and the first match wins; "default" is used when nothing matches.
+#
+# Condition examples:
+#   {"class": "person", "gt": 10}                       more than 10 people
+#   {"class": "person", "zone": "entrance", "gte": 3}    3+ people at the entrance
+#   [{"class": "person", "gte": 1}, {"class": "backpack", "gte": 1}]
+#                                                       person AND backpack
+
+import json
+import os
+
+import numpy as np
+
+DEFAULT_RULES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "rules.json")
+
+# Set MONITOR_RULES=/path/to/rules.yaml to use your own rules
+RULES_ENV = "MONITOR_RULES"
+
+DECISION_FIELDS = ("status", "alert_level", "action", "color")
+OPERATORS = ("gt", "gte", "lt", "lte", "eq")
+
+
+# ============================================================
+# 📄 LOADING
+# ============================================================
+def _read_config(path):
+    with open(path, encoding="utf-8") as f:
+        if path.lower().endswith((".yml", ".yaml")):
+            import yaml  # only needed for YAML rule files
+            return yaml.safe_load(f)
+        return json.load(f)
+
+
+def _bounds(condition):
+    """Turn a condition into an inclusive [low, high] count range."""
+    unknown = set(condition) - {"class", "zone"} - set(OPERATORS)
+    if unknown:
+        raise ValueError(f"Unknown rule condition keys: {sorted(unknown)}")
+    if "class" not in condition:
+        raise ValueError(f"Rule condition needs a 'class': {condition}")
+
+    low, high = -np.inf, np.inf
+    # Strict bounds become the next float past the limit, so smoothed
+    # (fractional) counts like alerts.py's window means compare exactly too
+    if "gt" in condition:
+        low = max(low, np.nextafter(condition["gt"], np.inf))
+    if "gte" in condition:
+        low = max(low, condition["gte"])
+    if "lt" in condition:
+        high = min(high, np.nextafter(condition["lt"], -np.inf))
+    if "lte" in condition:
+        high = min(high, condition["lte"])
+    if "eq" in condition:
+        low = max(low, condition["eq"])
+        high = min(high, condition["eq"])
+    return low, high
+
+
+# ============================================================
+# ⚡ COMPILED RULE ENGINE
+# ============================================================
+class RuleEngine:
+    """Rules compiled into two (rules x channels) matrices of count bounds.
+
+    A channel is one (zone, class) pair, with zone None for the whole frame.
+    Checking every rule against a frame is then a couple of NumPy
+    comparisons, however many rules there are.
+    """
+
+    def __init__(self, rules, default):
+        self.rules = list(rules)
+        self.default = dict(default)
+
+        channels = {}
+        for rule in self.rules:
+            for condition in self._conditions(rule):
+                key = (condition.get("zone"), condition["class"])
+                channels.setdefault(key, len(channels))
+        self.channels = list(channels)
+        self._channel_index = channels
+
+        self.low = np.full((len(self.rules), len(channels)), -np.inf)
+        self.high = np.full((len(self.rules), len(channels)), np.inf)
+        for r, rule in enumerate(self.rules):
+            for condition in self._conditions(rule):
+                c = channels[(condition.get("zone"), condition["class"])]
+                low, high = _bounds(condition)
+                self.low[r, c] = max(self.low[r, c], low)
+                self.high[r, c] = min(self.high[r, c], high)
+
+        self.decisions = [self._decision(rule) for rule in self.rules]
+        self.default_decision = self._decision(self.default)
+
+    @staticmethod
+    def _conditions(rule):
+        when = rule.get("when", [])
+        return [when] if isinstance(when, dict) else when
+
+    @staticmethod
+    def _decision(rule):
+        decision = {field: rule.get(field, "") for field in DECISION_FIELDS}
+        decision["rule"] = rule.get("name", "")
+        return decision
+
+    @classmethod
+    def from_config(cls, config):
+        return cls(config.get("rules", []), config.get("default", {}))
+
+    @classmethod
+    def from_file(cls, path):
+        return cls.from_config(_read_config(path))
+
+    # ---------- building count vectors ----------
+    def vector(self, counts, zone_counts=None):
+        """Count vector for this engine's channels.
+
+        counts: {class name: count} for the whole frame
+        zone_counts: {zone name: {class name: count}}
+        """
+        zone_counts = zone_counts or {}
+        vec = np.zeros(len(self.channels))
+        for i, (zone, name) in enumerate(self.channels):
+            source = counts if zone is None else zone_counts.get(zone, {})
+            vec[i] = source.get(name, 0)
+        return vec
+
+    def vector_from_detections(self, detections, zone_counts=None):
+        """Count vector straight from a Detections object."""
+        return self.vector(detections.histogram(), zone_counts)
+
+    # ---------- evaluating ----------
+    def match_many(self, vectors):
+        """Index of the first matching rule per frame (-1 = default).
+
+        vectors: (frames x channels) array of counts.
+        """
+        vectors = np.atleast_2d(vectors)
+        if not self.rules:
+            return np.full(len(vectors), -1)
+        ok = (vectors[:, None, :] >= self.low) & (vectors[:, None, :] <= self.high)
+        matched = ok.all(axis=2)
+        first = matched.argmax(axis=1)
+        return np.where(matched.any(axis=1), first, -1)
+
+    def decide_vector(self, vec):
+        index = int(self.match_many(vec)[0])
+        decision = self.default_decision if index < 0 else self.decisions[index]
+        return dict(decision)
+
+    def decide(self, counts, zone_counts=None):
+        """Decision dict (status, alert_level, action, color, rule) for one frame."""
+        return self.decide_vector(self.vector(counts, zone_counts))
+
+    def decide_detections(self, detections, zone_counts=None):
+        return self.decide_vector(self.vector_from_detections(detections, zone_counts))
+
+
+# ============================================================
+# 🔗 SHARED ENGINE
+# ============================================================
+_engines = {}
+
+
+def load_rules(path=None):
+    """Return the compiled engine for a rules file (cached per path)."""
+    path = path or os.getenv(RULES_ENV) or DEFAULT_RULES_PATH
+    engine = _engines.get(path)
+    if engine is None:
+        engine = RuleEngine.from_file(path)
+        _engines[path] = engine
+    return engine
+
+
+def decide_people(person_count, path=None):
+    """Shortcut for the classic "how many people?" decision."""
+    return load_rules(path).decide({"person": person_count})
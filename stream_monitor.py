@@ -0,0 +1,364 @@
+# 🎥 Continuous Stream Monitoring
+# Watch a video file, webcam or RTSP camera - not just one photo!
+#
+# Usage:
+#   python stream_monitor.py video.mp4
+#   python stream_monitor.py 0                      (webcam)
+#   python stream_monitor.py rtsp://camera/stream
+
+import argparse
+import collections
+import math
+import threading
+import time
+
+import cv2
+
+import metrics
+from alerts import AlertManager
+from detections import Detections
+from event_store import get_event_store
+from model_registry import get_model
+from motion_gate import MotionGate
+from rules import load_rules
+from tracker import Tracker
+
+
+# ============================================================
+# 📬 BOUNDED FRAME QUEUE (drop-oldest)
+# ============================================================
+class FrameQueue:
+    """A small queue that throws away the OLDEST frame when it is full.
+
+    For a live camera an old frame is worthless - we always want the newest.
+    put(item, block=True) waits for room instead, for sources that can wait.
+    """
+
+    def __init__(self, maxsize=2):
+        self._frames = collections.deque()
+        self._maxsize = maxsize
+        self._cond = threading.Condition()
+        self._closed = False
+        self.dropped = 0
+
+    def put(self, item, block=False):
+        with self._cond:
+            if block:
+                while len(self._frames) >= self._maxsize and not self._closed:
+                    self._cond.wait()
+                if self._closed:
+                    return
+            elif len(self._frames) >= self._maxsize:
+                self._frames.popleft()
+                self.dropped += 1
+            self._frames.append(item)
+            self._cond.notify_all()
+
+    def __len__(self):
+        with self._cond:
+            return len(self._frames)
+
+    def get(self, timeout=None):
+        """Return the next item, or None once the queue is closed and empty."""
+        with self._cond:
+            while not self._frames and not self._closed:
+                if not self._cond.wait(timeout):
+                    return None
+            if self._frames:
+                item = self._frames.popleft()
+                self._cond.notify_all()  # wake a blocked put()
+                return item
+            return None
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+
+# ============================================================
+# 📊 STATISTICS
+# ============================================================
+class StreamStats:
+    """Counters reported by the stream monitor."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.frames_read = 0
+        self.frames_skipped = 0
+        self.frames_dropped = 0
+        self.frames_processed = 0
+        self.total_latency = 0.0
+        self.max_latency = 0.0
+        self.skip_every = 1
+
+    @property
+    def fps(self):
+        elapsed = time.perf_counter() - self.started
+        return self.frames_processed / elapsed if elapsed > 0 else 0.0
+
+    @property
+    def avg_latency_ms(self):
+        if not self.frames_processed:
+            return 0.0
+        return self.total_latency / self.frames_processed * 1000
+
+    def as_dict(self):
+        return {
+            "fps": round(self.fps, 2),
+            "frames_read": self.frames_read,
+            "frames_processed": self.frames_processed,
+            "frames_skipped": self.frames_skipped,
+            "frames_dropped": self.frames_dropped,
+            "avg_latency_ms": round(self.avg_latency_ms, 1),
+            "max_latency_ms": round(self.max_latency * 1000, 1),
+            "skip_every": self.skip_every,
+        }
+
+
+# ============================================================
+# 🎥 STREAM MONITOR
+# ============================================================
+def is_live(source):
+    """Webcams and network streams run in real time; files don't."""
+    return str(source).isdigit() or "://" in str(source)
+
+
+def open_source(source):
+    """Open a video file, webcam index ("0") or RTSP/HTTP URL."""
+    if isinstance(source, str) and source.isdigit():
+        source = int(source)
+    cap = cv2.VideoCapture(source)
+    if not cap.isOpened():
+        raise IOError(f"Cannot open video source: {source}")
+    return cap
+
+
+class StreamMonitor:
+    """Reads frames in one thread and runs detection in another.
+
+    The two threads are linked by a FrameQueue. The reader adapts how many
+    frames it skips to how fast the detector actually is, so the detector
+    keeps up in real time instead of building up a backlog.
+    """
+
+    def __init__(self, source, model=None, queue_size=2, realtime=None,
+                 on_result=None, track=True, motion_gate=None, alerts=None):
+        self.source = source
+        self.model = model or get_model()
+        # Optional MotionGate: reuse the last results while the scene is still
+        self.motion_gate = motion_gate
+        # History of every processed frame (if MONITOR_EVENTS is set)
+        self.event_store = get_event_store()
+        self.camera = str(source)
+        # Optional AlertManager: debounced alert levels, events on changes only
+        self.alerts = alerts
+        self._last = None
+        # Tracking gives stable counts instead of single-frame flicker
+        self.tracker = Tracker() if track else None
+        self.queue = FrameQueue(queue_size)
+        self.on_result = on_result
+        self.stats = StreamStats()
+        self._stop = threading.Event()
+        self._infer_time = None  # moving average of seconds per inference
+
+        # Files are read as fast as the disk allows unless we pace them
+        # like a real camera. Live sources are always "real time".
+        if realtime is None:
+            realtime = not is_live(source)
+        self.realtime = realtime
+        # An unpaced file has no "newest frame" to keep up with: wait for the
+        # detector instead of dropping or skipping frames
+        self.backpressure = not realtime and not is_live(source)
+
+    def stop(self):
+        self._stop.set()
+
+    def _update_skip(self, source_fps):
+        if self._infer_time is None or not source_fps:
+            return
+        # How many source frames arrive while we run one inference?
+        self.stats.skip_every = max(1, math.ceil(self._infer_time * source_fps))
+
+    def _reader(self, cap):
+        source_fps = cap.get(cv2.CAP_PROP_FPS) or 0
+        frame_interval = 1.0 / source_fps if source_fps > 0 else 0
+        next_time = time.perf_counter()
+        index = 0
+
+        try:
+            while not self._stop.is_set():
+                with metrics.stage("decode"):
+                    ok, frame = cap.read()
+                if not ok:
+                    break
+                captured = time.perf_counter()
+                self.stats.frames_read += 1
+
+                if self.backpressure:
+                    self.queue.put((index, captured, frame), block=True)
+                    index += 1
+                    continue
+
+                self._update_skip(source_fps)
+                if index % self.stats.skip_every == 0:
+                    self.queue.put((index, captured, frame))
+                else:
+                    self.stats.frames_skipped += 1
+                    metrics.inc("frames_skipped")
+                index += 1
+
+                if self.realtime and frame_interval:
+                    next_time += frame_interval
+                    delay = next_time - time.perf_counter()
+                    if delay > 0:
+                        time.sleep(delay)
+        finally:
+            cap.release()
+            self.queue.close()
+
+    def _detect(self, frame):
+        run = True
+        if self.motion_gate is not None:
+            with metrics.stage("motion_gate"):
+                run = self.motion_gate.should_run(frame)
+
+        if not run and self._last is not None:
+            metrics.inc("frames_gated")
+            results, detections = self._last
+        else:
+            results = self.model(frame, verbose=False)
+            metrics.record_model_speed(results[0])
+            with metrics.stage("extract"):
+                detections = Detections.from_result(results[0])
+            self._last = (results, detections)
+
+        if self.event_store is not None:
+            decision = load_rules().decide_detections(detections)
+            self.event_store.append_detections(self.camera, detections, decision)
+
+        if self.alerts is not None:
+            self.alerts.update(self.camera, detections)
+
+        if self.tracker is not None:
+            self.tracker.update_detections(detections)
+            return results, self.tracker.occupancy
+        return results, detections.count("person")
+
+    def run(self, max_frames=None):
+        """Process the stream until it ends, stop() is called or max_frames."""
+        cap = open_source(self.source)
+        reader = threading.Thread(target=self._reader, args=(cap,), daemon=True)
+        self.stats = StreamStats()
+        reader.start()
+
+        try:
+            while not self._stop.is_set():
+                item = self.queue.get(timeout=1.0)
+                if item is None:
+                    if not reader.is_alive():
+                        break
+                    continue
+                index, captured, frame = item
+
+                start = time.perf_counter()
+                results, person_count = self._detect(frame)
+                done = time.perf_counter()
+
+                elapsed = done - start
+                if self._infer_time is None:
+                    self._infer_time = elapsed
+                else:
+                    self._infer_time = 0.8 * self._infer_time + 0.2 * elapsed
+
+                latency = done - captured
+                metrics.observe("end_to_end", latency)
+                metrics.inc("frames_processed")
+                if self.queue.dropped > self.stats.frames_dropped:
+                    metrics.inc("frames_dropped", self.queue.dropped - self.stats.frames_dropped)
+                self.stats.frames_processed += 1
+                self.stats.total_latency += latency
+                self.stats.max_latency = max(self.stats.max_latency, latency)
+                self.stats.frames_dropped = self.queue.dropped
+
+                if self.on_result:
+                    self.on_result(index, results, person_count)
+
+                if max_frames and self.stats.frames_processed >= max_frames:
+                    break
+        finally:
+            self.stop()
+            self.queue.close()  # unblock a reader waiting for room
+            reader.join(timeout=2.0)
+            self.stats.frames_dropped = self.queue.dropped
+
+        return self.stats
+
+
+# ============================================================
+# 🚀 COMMAND LINE
+# ============================================================
+def main():
+    parser = argparse.ArgumentParser(description="Monitor a video stream")
+    parser.add_argument("source", help="video file, webcam index or RTSP URL")
+    parser.add_argument("--queue-size", type=int, default=2)
+    parser.add_argument("--max-frames", type=int, default=None)
+    parser.add_argument("--no-realtime", action="store_true",
+                        help="process every frame of a file as fast as possible")
+    parser.add_argument("--no-track", action="store_true",
+                        help="count people per frame without tracking")
+    parser.add_argument("--motion-gate", action="store_true",
+                        help="skip inference on frames where nothing moved")
+    parser.add_argument("--alert-window", type=float, default=10.0,
+                        help="seconds of counts the alert level is based on")
+    parser.add_argument("--alert-stat", default="mean",
+                        help="'mean' or a percentile like 'p90' over the window")
+    args = parser.parse_args()
+    metrics.start_server_from_env()
+
+    print("=" * 50)
+    print("🎥 Stream Monitoring")
+    print("=" * 50)
+
+    def show(index, results, person_count):
+        line = f"🖼️  Frame {index:>6} | 👥 People: {person_count}"
+        if monitor.tracker is not None:
+            line += f" | 🚶 Visitors so far: {monitor.tracker.unique_visitors}"
+        print(line)
+
+    def show_alert(camera, event):
+        arrow = "🔺" if event["escalation"] else "🔻"
+        print(f"{arrow} ALERT {event['from']['alert_level']} -> {event['to']['alert_level']}"
+              f" | {event['to']['status']} | {event['to']['action']}")
+
+    monitor = StreamMonitor(
+        args.source,
+        queue_size=args.queue_size,
+        realtime=False if args.no_realtime else None,
+        on_result=show,
+        track=not args.no_track,
+        motion_gate=MotionGate() if args.motion_gate else None,
+        alerts=AlertManager(show_alert, window=args.alert_window, statistic=args.alert_stat),
+    )
+
+    try:
+        stats = monitor.run(max_frames=args.max_frames)
+    except KeyboardInterrupt:
+        monitor.stop()
+        stats = monitor.stats
+
+    print("\n📊 STREAM STATS:")
+    print("-" * 50)
+    for name, value in stats.as_dict().items():
+        print(f"   {name:<18} {value}")
+    if monitor.tracker is not None:
+        for name, value in monitor.tracker.stats().items():
+            print(f"   {name:<18} {value}")
+    if monitor.motion_gate is not None:
+        for name, value in monitor.motion_gate.stats().items():
+            print(f"   gate_{name:<13} {value}")
+    print("-" * 50)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,181 @@
+# 🔬 Tiled Detection
+# Find the small, far-away people in big wide-angle photos!
+#
+#   detector = TiledDetector()
+#   detections = detector.detect(model, image, zones)   # a Detections object
+#
+# yolov8n looks at a 640px copy of the frame, so in a 4000px photo a person
+# at the back is only a few pixels tall and gets missed. Here the frame is
+# also cut into overlapping tiles that are run (as ONE batch) at about full
+# resolution, and the boxes of all tiles and the full-frame pass are merged.
+#
+# - the tile size follows the image size and how small the people found by
+#   the full-frame pass are (tiny people -> smaller tiles, zoomed in more)
+# - tiles that don't touch any zone are skipped
+# - duplicates across tile borders are removed with a class-aware NMS that
+#   compares every pair of boxes at once. Boxes from different passes use
+#   intersection over the smaller box (so half a person cut off by a tile
+#   edge is merged with the whole one); boxes from the same pass use plain
+#   IoU, so people standing close together in a crowd are kept apart
+
+import os
+
+import numpy as np
+
+import metrics
+from detections import Detections
+from image_io import MODEL_SIZE
+
+# Set MONITOR_TILING=1 to use tiled detection in the app and the CLI
+TILING_ENV = "MONITOR_TILING"
+
+
+def tiling_enabled():
+    return os.getenv(TILING_ENV, "").lower() in ("1", "true", "yes")
+
+
+# ============================================================
+# 🧩 TILE GRID
+# ============================================================
+def tile_boxes(shape, tile, overlap=0.2):
+    """(N, 4) int array of overlapping tiles covering a frame, row by row."""
+    h, w = shape[:2]
+    stride = max(1, int(tile * (1 - overlap)))
+
+    def starts(length):
+        if length <= tile:
+            return [0]
+        return list(range(0, length - tile, stride)) + [length - tile]
+
+    return np.array(
+        [(x, y, min(x + tile, w), min(y + tile, h)) for y in starts(h) for x in starts(w)],
+        dtype=np.int64,
+    )
+
+
+def boxes_touching(tiles, boxes):
+    """Mask of the tiles that overlap at least one of the (M, 4) boxes."""
+    if not len(boxes):
+        return np.zeros(len(tiles), dtype=bool)
+    return (
+        (tiles[:, None, 0] < boxes[None, :, 2]) & (tiles[:, None, 2] > boxes[None, :, 0])
+        & (tiles[:, None, 1] < boxes[None, :, 3]) & (tiles[:, None, 3] > boxes[None, :, 1])
+    ).any(axis=1)
+
+
+# ============================================================
+# 🔀 MERGING
+# ============================================================
+def merge_nms(xyxy, conf, cls, threshold=0.5, metric="ios", source=None):
+    """Indices of the boxes to keep, most confident first.
+
+    Boxes of the same class overlapping a more confident one by more than
+    threshold are dropped. metric is "ios" (intersection over the smaller
+    box) or "iou". With source (which pass each box came from), metric is
+    only used between different sources and IoU within one.
+    """
+    if not len(conf):
+        return np.zeros(0, dtype=np.int64)
+    order = np.argsort(-conf, kind="stable")
+    boxes, classes = xyxy[order], cls[order]
+
+    x1 = np.maximum(boxes[:, None, 0], boxes[None, :, 0])
+    y1 = np.maximum(boxes[:, None, 1], boxes[None, :, 1])
+    x2 = np.minimum(boxes[:, None, 2], boxes[None, :, 2])
+    y2 = np.minimum(boxes[:, None, 3], boxes[None, :, 3])
+    inter = np.clip(x2 - x1, 0, None) * np.clip(y2 - y1, 0, None)
+    area = (boxes[:, 2] - boxes[:, 0]) * (boxes[:, 3] - boxes[:, 1])
+    union = area[:, None] + area[None, :] - inter
+    if metric == "ios":
+        smaller = np.minimum(area[:, None], area[None, :])
+        if source is None:
+            union = smaller
+        else:
+            sources = np.asarray(source)[order]
+            union = np.where(sources[:, None] != sources[None, :], smaller, union)
+    overlaps = inter / np.maximum(union, 1e-9) > threshold
+    overlaps &= classes[:, None] == classes[None, :]
+    # Only a more confident box (earlier row) may suppress a later one
+    overlaps = np.triu(overlaps, k=1)
+
+    suppressed = np.zeros(len(order), dtype=bool)
+    for i in range(len(order)):
+        if not suppressed[i]:
+            suppressed |= overlaps[i]
+    return order[~suppressed]
+
+
+# ============================================================
+# 🔬 TILED DETECTOR
+# ============================================================
+class TiledDetector:
+    """Full-frame pass + one batch of tiles, merged into one Detections."""
+
+    def __init__(self, tile=MODEL_SIZE, overlap=0.2, min_box=24, min_tile=320,
+                 max_tiles=16, nms_threshold=0.5, zone_margin=64):
+        self.tile = tile
+        self.overlap = overlap
+        self.min_box = min_box      # people shorter than this at model input are "tiny"
+        self.min_tile = min_tile
+        self.max_tiles = max_tiles
+        self.nms_threshold = nms_threshold
+        self.zone_margin = zone_margin
+
+    def tile_size(self, shape, detections):
+        """Tile size for this frame, or None when tiling would not help."""
+        long_side = max(shape[:2])
+        if long_side <= self.tile * 1.25:
+            return None  # the model already sees (almost) full resolution
+        tile = self.tile
+        people = detections.xyxy[detections.mask("person")]
+        if len(people):
+            heights = (people[:, 3] - people[:, 1]) * MODEL_SIZE / long_side
+            if np.median(heights) < self.min_box:
+                tile = max(self.min_tile, tile // 2)
+        # Bigger tiles until the batch is small enough
+        while len(tile_boxes(shape, tile, self.overlap)) > self.max_tiles:
+            tile = int(tile * 1.25)
+        return tile
+
+    def tiles(self, shape, detections, zones=None):
+        """Tiles worth running for this frame, (N, 4)."""
+        tile = self.tile_size(shape, detections)
+        if tile is None:
+            return np.zeros((0, 4), dtype=np.int64)
+        tiles = tile_boxes(shape, tile, self.overlap)
+        if zones:
+            m = self.zone_margin
+            regions = np.array([
+                (p[:, 0].min() - m, p[:, 1].min() - m, p[:, 0].max() + m, p[:, 1].max() + m)
+                for p in zones.polygons(shape)
+            ])
+            keep = boxes_touching(tiles, regions)
+            metrics.inc("tiles_skipped", int(np.count_nonzero(~keep)))
+            tiles = tiles[keep]
+        return tiles
+
+    def detect(self, model, image, zones=None, **kwargs):
+        """Detections for the whole frame, including the small people."""
+        full = Detections.from_result(model(image, verbose=False, **kwargs)[0])
+        tiles = self.tiles(image.shape, full, zones)
+        if not len(tiles):
+            return full
+
+        crops = [image[y1:y2, x1:x2] for x1, y1, x2, y2 in tiles.tolist()]
+        with metrics.stage("tiles"):
+            results = model(crops, verbose=False, **kwargs)
+        metrics.inc("tiles_run", len(crops))
+
+        parts = [full]
+        for (x1, y1, _, _), result in zip(tiles.tolist(), results):
+            part = Detections.from_result(result)
+            part.xyxy = part.xyxy + np.array([x1, y1, x1, y1], dtype=np.float32)
+            parts.append(part)
+
+        xyxy = np.concatenate([p.xyxy for p in parts])
+        conf = np.concatenate([p.conf for p in parts])
+        cls = np.concatenate([p.cls for p in parts])
+        source = np.repeat(np.arange(len(parts)), [len(p) for p in parts])
+        with metrics.stage("tile_merge"):
+            keep = merge_nms(xyxy, conf, cls, self.nms_threshold, source=source)
+        return Detections(xyxy[keep], conf[keep], cls[keep], full.names)
@@ -0,0 +1,269 @@
+# 🧭 People Tracker
+# Follow people from frame to frame, so we know who is NEW and how long
+# everyone has been here!
+#
+# A small SORT/ByteTrack-style tracker:
+#   - every track has a Kalman filter (position + velocity of its box)
+#   - new boxes are matched to tracks by IoU (overlap)
+#   - confident boxes are matched first, weak boxes only to existing tracks
+# All tracks are stored in NumPy arrays and updated together.
+
+import time
+
+import numpy as np
+
+# ============================================================
+# 📐 BOX HELPERS
+# ============================================================
+def xyxy_to_z(boxes):
+    """[x1, y1, x2, y2] -> [center x, center y, area, aspect ratio]."""
+    w = boxes[:, 2] - boxes[:, 0]
+    h = boxes[:, 3] - boxes[:, 1]
+    return np.stack([
+        boxes[:, 0] + w / 2,
+        boxes[:, 1] + h / 2,
+        w * h,
+        w / np.maximum(h, 1e-6),
+    ], axis=1)
+
+
+def z_to_xyxy(z):
+    area = np.maximum(z[:, 2], 1e-6)
+    ratio = np.maximum(z[:, 3], 1e-6)
+    w = np.sqrt(area * ratio)
+    h = area / np.maximum(w, 1e-6)
+    return np.stack([
+        z[:, 0] - w / 2, z[:, 1] - h / 2,
+        z[:, 0] + w / 2, z[:, 1] + h / 2,
+    ], axis=1)
+
+
+def iou_matrix(a, b):
+    """IoU between every box in a (N, 4) and every box in b (M, 4)."""
+    if not len(a) or not len(b):
+        return np.zeros((len(a), len(b)))
+    # Two (N, M) buffers reused in place instead of a temporary per step
+    w = np.minimum(a[:, None, 2], b[None, :, 2])
+    w -= np.maximum(a[:, None, 0], b[None, :, 0])
+    h = np.minimum(a[:, None, 3], b[None, :, 3])
+    h -= np.maximum(a[:, None, 1], b[None, :, 1])
+    np.maximum(w, 0, out=w)
+    np.maximum(h, 0, out=h)
+    inter = np.multiply(w, h, out=w)
+    area_a = (a[:, 2] - a[:, 0]) * (a[:, 3] - a[:, 1])
+    area_b = (b[:, 2] - b[:, 0]) * (b[:, 3] - b[:, 1])
+    union = np.add(area_a[:, None], area_b[None, :], out=h)
+    union -= inter
+    np.maximum(union, 1e-9, out=union)
+    return np.divide(inter, union, out=inter)
+
+
+def greedy_match(iou, threshold):
+    """Match rows to columns, best IoU first. Returns (rows, cols) arrays.
+
+    A pair that is the best of both its row and its column is always taken
+    by best-first matching, so every such pair is taken at once; then they
+    are removed and the rest matched again. Usually 1-3 rounds.
+    """
+    rows, cols = np.arange(iou.shape[0]), np.arange(iou.shape[1])
+    iou = np.where(iou >= threshold, iou, -1.0)
+    keep_r, keep_c = [], []
+    while iou.size:
+        best_col = iou.argmax(axis=1)
+        best_row = iou.argmax(axis=0)
+        r = np.flatnonzero((best_row[best_col] == np.arange(len(rows)))
+                           & (iou[np.arange(len(rows)), best_col] >= 0))
+        if not len(r):
+            break
+        c = best_col[r]
+        keep_r.append(rows[r])
+        keep_c.append(cols[c])
+        row_left = np.ones(len(rows), dtype=bool)
+        row_left[r] = False
+        col_left = np.ones(len(cols), dtype=bool)
+        col_left[c] = False
+        iou = iou[row_left][:, col_left]
+        rows, cols = rows[row_left], cols[col_left]
+    if not keep_r:
+        return np.zeros(0, dtype=int), np.zeros(0, dtype=int)
+    return np.concatenate(keep_r), np.concatenate(keep_c)
+
+
+# ============================================================
+# 📈 KALMAN FILTER (constant velocity, all tracks at once)
+# ============================================================
+# State: [cx, cy, area, ratio, vx, vy, v_area]
+# Transition F adds each velocity to its value; measurement H = the first 4
+_Q = np.diag([1.0, 1.0, 1.0, 1e-4, 1e-2, 1e-2, 1e-4])
+_R = np.diag([1.0, 1.0, 10.0, 1e-2])
+_P0 = np.diag([10.0, 10.0, 10.0, 10.0, 1e4, 1e4, 1e4])
+_R_DIAG = np.diag(_R).copy()
+
+
+def _predict(x, P):
+    # F adds each velocity to its position: F x and F P F' as row/column
+    # additions instead of batched 7x7 matrix products
+    x = x.copy()
+    x[:, :3] += x[:, 4:]
+    x[:, 2] = np.maximum(x[:, 2], 1e-6)
+    P = P.copy()
+    P[:, :3, :] += P[:, 4:, :]
+    P[:, :, :3] += P[:, :, 4:]
+    P += _Q
+    return x, P
+
+
+def _update(x, P, z):
+    # H only picks the first 4 states, so H @ P is P's first 4 rows. F, Q, R
+    # and P0 never couple two different measured states, so S = H P H' + R
+    # stays diagonal and S^-1 is a division - no batched matrix inverse.
+    HP = P[:, :4, :]
+    S = np.einsum("nii->ni", HP[:, :, :4]) + _R_DIAG
+    K = HP.transpose(0, 2, 1) / S[:, None, :]
+    x = x + np.einsum("nij,nj->ni", K, z - x[:, :4])
+    P = P - K @ HP
+    return x, P
+
+
+# ============================================================
+# 🧭 TRACKER
+# ============================================================
+class Tracker:
+    """Keeps persistent IDs for people across frames.
+
+    - high_conf: boxes at or above this start and update tracks first
+    - low_conf: weaker boxes can only keep existing tracks alive
+    - min_hits: a track counts as a real person after this many frames
+    - max_missed: a track is dropped after this many frames without a box
+    """
+
+    def __init__(self, iou_threshold=0.3, high_conf=0.5, low_conf=0.1,
+                 min_hits=3, max_missed=30, smoothing=0.2):
+        self.iou_threshold = iou_threshold
+        self.high_conf = high_conf
+        self.low_conf = low_conf
+        self.min_hits = min_hits
+        self.max_missed = max_missed
+        self.smoothing = smoothing
+
+        self.x = np.zeros((0, 7))
+        self.P = np.zeros((0, 7, 7))
+        self.ids = np.zeros(0, dtype=np.int64)
+        self.hits = np.zeros(0, dtype=np.int64)
+        self.missed = np.zeros(0, dtype=np.int64)
+        self.first_seen = np.zeros(0)
+        self.last_seen = np.zeros(0)
+
+        self._next_id = 1
+        self.unique_visitors = 0
+        self.smoothed_count = 0.0
+        self.finished_dwell = []  # dwell times (seconds) of tracks that left
+
+    def _keep(self, mask):
+        self.x, self.P = self.x[mask], self.P[mask]
+        self.ids, self.hits, self.missed = self.ids[mask], self.hits[mask], self.missed[mask]
+        self.first_seen, self.last_seen = self.first_seen[mask], self.last_seen[mask]
+
+    def _spawn(self, boxes, now):
+        n = len(boxes)
+        if not n:
+            return
+        x = np.zeros((n, 7))
+        x[:, :4] = xyxy_to_z(boxes)
+        self.x = np.concatenate([self.x, x])
+        self.P = np.concatenate([self.P, np.repeat(_P0[None], n, axis=0)])
+        self.ids = np.concatenate([self.ids, np.arange(self._next_id, self._next_id + n)])
+        self._next_id += n
+        self.hits = np.concatenate([self.hits, np.ones(n, dtype=np.int64)])
+        self.missed = np.concatenate([self.missed, np.zeros(n, dtype=np.int64)])
+        self.first_seen = np.concatenate([self.first_seen, np.full(n, now)])
+        self.last_seen = np.concatenate([self.last_seen, np.full(n, now)])
+
+    def update(self, boxes, scores, now=None):
+        """Feed one frame of person boxes (N, 4 xyxy) and scores (N,).
+
+        Returns (ids, boxes) of the confirmed tracks seen in this frame.
+        """
+        now = time.time() if now is None else now
+        boxes = np.asarray(boxes, dtype=float).reshape(-1, 4)
+        scores = np.asarray(scores, dtype=float).reshape(-1)
+
+        if len(self.x):
+            self.x, self.P = _predict(self.x, self.P)
+        predicted = z_to_xyxy(self.x[:, :4]) if len(self.x) else np.zeros((0, 4))
+
+        high = scores >= self.high_conf
+        low = ~high & (scores >= self.low_conf)
+        high_idx, low_idx = np.flatnonzero(high), np.flatnonzero(low)
+
+        # One IoU matrix for both stages
+        overlap = iou_matrix(predicted, boxes)
+
+        # Stage 1: confident boxes vs all tracks
+        t1, d1 = greedy_match(overlap[:, high_idx], self.iou_threshold)
+        matched_tracks = np.zeros(len(self.x), dtype=bool)
+        matched_tracks[t1] = True
+
+        # Stage 2: weak boxes vs tracks still unmatched
+        free = np.flatnonzero(~matched_tracks)
+        t2, d2 = greedy_match(overlap[np.ix_(free, low_idx)], self.iou_threshold)
+        t2 = free[t2]
+        matched_tracks[t2] = True
+
+        track_idx = np.concatenate([t1, t2])
+        det_idx = np.concatenate([high_idx[d1], low_idx[d2]])
+        if len(track_idx):
+            x, P = _update(self.x[track_idx], self.P[track_idx], xyxy_to_z(boxes[det_idx]))
+            self.x[track_idx], self.P[track_idx] = x, P
+            self.hits[track_idx] += 1
+            self.missed[track_idx] = 0
+            self.last_seen[track_idx] = now
+
+        # Count people who just became confirmed tracks
+        self.unique_visitors += int(np.count_nonzero(self.hits[track_idx] == self.min_hits))
+
+        self.missed[~matched_tracks] += 1
+        gone = self.missed > self.max_missed
+        if gone.any():
+            left = gone & (self.hits >= self.min_hits)
+            self.finished_dwell.extend((self.last_seen[left] - self.first_seen[left]).tolist())
+            self._keep(~gone)
+
+        # Only confident boxes may start a new track
+        unmatched = np.ones(len(high_idx), dtype=bool)
+        unmatched[d1] = False
+        self._spawn(boxes[high_idx[unmatched]], now)
+        if self.min_hits <= 1:
+            self.unique_visitors += int(np.count_nonzero(unmatched))
+
+        visible = (self.missed == 0) & (self.hits >= self.min_hits)
+        count = int(np.count_nonzero(visible))
+        self.smoothed_count += self.smoothing * (count - self.smoothed_count)
+        return self.ids[visible], z_to_xyxy(self.x[visible, :4])
+
+    def update_detections(self, detections, class_name="person", now=None):
+        """update() straight from a Detections object."""
+        people = detections.filter(min_conf=self.low_conf, name=class_name)
+        return self.update(people.xyxy, people.conf, now)
+
+    # ---------- stats ----------
+    @property
+    def occupancy(self):
+        """Smoothed number of people in view (no single-frame flicker)."""
+        return int(round(self.smoothed_count))
+
+    def dwell_times(self, now=None):
+        """{track id: seconds in view} for confirmed tracks still around."""
+        now = time.time() if now is None else now
+        confirmed = self.hits >= self.min_hits
+        seconds = now - self.first_seen[confirmed]
+        return dict(zip(self.ids[confirmed].tolist(), seconds.round(1).tolist()))
+
+    def stats(self):
+        finished = self.finished_dwell
+        return {
+            "occupancy": self.occupancy,
+            "active_tracks": int(np.count_nonzero(self.hits >= self.min_hits)),
+            "unique_visitors": self.unique_visitors,
+            "avg_dwell_seconds": round(sum(finished) / len(finished), 1) if finished else 0.0,
+        }
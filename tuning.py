@@ -0,0 +1,116 @@
+# 🎛️ Tuning Profile
+# The best model variant, thread counts and batch size for THIS machine,
+# found once by optimize.py and used by every entry point.
+#
+# monitor_profile.json (written by `python optimize.py`):
+#   {"model": {"weights": "yolov8n_int8.onnx", "backend": "onnx"},
+#    "threads": {"intra_op": 4, "inter_op": 1},
+#    "batch_size": 8, ...}
+#
+# model_registry.get_model() calls activate() before loading anything, so
+# app.py, the CLI scripts and the servers pick the profile up for free.
+# Only light imports here: this module is loaded before torch is.
+
+import json
+import os
+import threading
+
+DEFAULT_PROFILE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                    "monitor_profile.json")
+
+# Set MONITOR_PROFILE=/path/to/profile.json (or "off" to ignore any profile)
+PROFILE_ENV = "MONITOR_PROFILE"
+
+_profile = None
+_loaded = False
+_activated = False
+_threads = None  # (intra_op, inter_op) set for this process
+_lock = threading.Lock()
+
+
+def profile_path():
+    return os.getenv(PROFILE_ENV) or DEFAULT_PROFILE_PATH
+
+
+def load_profile():
+    """The saved profile as a dict, or None if there isn't one (cached)."""
+    global _profile, _loaded
+    with _lock:
+        if not _loaded:
+            path = profile_path()
+            if path != "off" and os.path.exists(path):
+                with open(path, encoding="utf-8") as f:
+                    _profile = json.load(f)
+            _loaded = True
+        return _profile
+
+
+def save_profile(profile, path=None):
+    global _profile, _loaded
+    path = path or profile_path()
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(profile, f, indent=2)
+    with _lock:
+        _profile, _loaded = profile, True
+    return path
+
+
+def set_threads(intra_op=None, inter_op=None):
+    """Set torch's thread pools (and the OpenMP/MKL ones it may start).
+
+    The counts are also remembered for ONNX Runtime / OpenVINO sessions
+    loaded afterwards (see current_threads()).
+    """
+    global _threads
+    _threads = (intra_op, inter_op)
+    if intra_op:
+        for var in ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS"):
+            os.environ.setdefault(var, str(intra_op))
+    import torch
+
+    if intra_op:
+        torch.set_num_threads(intra_op)
+    if inter_op:
+        try:
+            torch.set_num_interop_threads(inter_op)
+        except RuntimeError:
+            pass  # can only be set before torch runs its first parallel job
+
+
+def current_threads():
+    """(intra_op, inter_op) from set_threads(), or None if never called."""
+    return _threads
+
+
+def activate(threads=True):
+    """Apply the profile's thread counts, once per process.
+
+    The first call wins: process_pool workers call activate(threads=False)
+    because they size their own threads.
+    """
+    global _activated
+    with _lock:
+        if _activated:
+            return
+        _activated = True
+    profile = load_profile()
+    if profile and threads:
+        settings = profile.get("threads", {})
+        set_threads(settings.get("intra_op"), settings.get("inter_op"))
+
+
+def profile_model():
+    """(weights, backend) chosen by the profile, or None."""
+    profile = load_profile()
+    if not profile or "model" not in profile:
+        return None
+    model = profile["model"]
+    if not os.path.exists(model["weights"]):
+        return None  # e.g. the INT8 file was deleted - fall back to defaults
+    return model["weights"], model["backend"]
+
+
+def tuned_batch_size(default):
+    """Batch size from the profile, or default."""
+    profile = load_profile()
+    return (profile or {}).get("batch_size") or default
@@ -0,0 +1,190 @@
+# 🗺️ Zones (Regions of Interest)
+# Count people per area - entrance, queue, restricted room...
+#
+# zones.json next to this file (or the file in MONITOR_ZONES) maps each camera to its zones:
+#
+#   {
+#     "default": [
+#       {"name": "entrance", "polygon": [[0, 400], [300, 400], [300, 720], [0, 720]]},
+#       {"name": "restricted", "polygon": [[0.6, 0], [1, 0], [1, 0.5], [0.6, 0.5]],
+#        "normalized": true}
+#     ]
+#   }
+#
+# A person is "in" a zone when the bottom-middle of their box (where their
+# feet are) is inside the polygon. Zone counts go to the rules engine as
+# zone_counts, so rules like {"class": "person", "zone": "entrance", "gt": 3}
+# work.
+
+import collections
+import json
+import os
+import threading
+
+import cv2
+import numpy as np
+
+from detections import Detections
+
+DEFAULT_ZONES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "zones.json")
+ZONES_ENV = "MONITOR_ZONES"
+
+# A full-frame label mask is 4 bytes per pixel (~33 MB at 4K): keep only
+# the masks of the last few frame sizes
+MAX_MASKS = 4
+
+
+def footpoints(xyxy):
+    """Bottom-middle point of every box, (N, 2)."""
+    return np.stack([(xyxy[:, 0] + xyxy[:, 2]) / 2, xyxy[:, 3]], axis=1)
+
+
+class ZoneSet:
+    """All zones of one camera, ready for fast lookups."""
+
+    def __init__(self, zones):
+        self.names = [zone["name"] for zone in zones]
+        self._zones = zones
+        self._masks = collections.OrderedDict()  # frame shape -> label mask (LRU)
+        self._masks_lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.names)
+
+    def polygons(self, shape):
+        """Zone polygons in pixels for a frame of this (height, width)."""
+        h, w = shape[:2]
+        result = []
+        for zone in self._zones:
+            points = np.asarray(zone["polygon"], dtype=np.float64)
+            if zone.get("normalized"):
+                points = points * [w, h]
+            result.append(points)
+        return result
+
+    # ---------- point in polygon ----------
+    def _label_mask(self, shape):
+        """One uint32 per pixel, bit i set when the pixel is in zone i.
+
+        Drawn once per frame size (the last MAX_MASKS sizes are kept); after
+        that each lookup is an array index.
+        """
+        if len(self) > 32:
+            return None
+        key = tuple(shape[:2])
+        with self._masks_lock:
+            mask = self._masks.get(key)
+            if mask is not None:
+                self._masks.move_to_end(key)
+                return mask
+        mask = np.zeros(key, dtype=np.uint32)
+        layer = np.zeros(key, dtype=np.uint8)
+        for i, polygon in enumerate(self.polygons(shape)):
+            layer[:] = 0
+            cv2.fillPoly(layer, [polygon.round().astype(np.int32)], 1)
+            mask |= layer.astype(np.uint32) << np.uint32(i)
+        with self._masks_lock:
+            self._masks[key] = mask
+            while len(self._masks) > MAX_MASKS:
+                self._masks.popitem(last=False)
+        return mask
+
+    def contains(self, points, shape):
+        """(N, zones) bool matrix: is point n inside zone z?"""
+        points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+        mask = self._label_mask(shape)
+        if mask is not None:
+            h, w = mask.shape
+            x = np.clip(points[:, 0].astype(np.int64), 0, w - 1)
+            y = np.clip(points[:, 1].astype(np.int64), 0, h - 1)
+            bits = mask[y, x]
+            return (bits[:, None] >> np.arange(len(self), dtype=np.uint32)) & 1 == 1
+        return self._contains_ray_casting(points, shape)
+
+    def _contains_ray_casting(self, points, shape):
+        """Even-odd rule over every (point, zone, edge) at once."""
+        polygons = self.polygons(shape)
+        most = max(len(p) for p in polygons)
+        # Pad polygons to the same length by repeating the last vertex
+        # (zero-length edges never count as crossings)
+        verts = np.stack([np.vstack([p, np.repeat(p[-1:], most - len(p), axis=0)]) for p in polygons])
+        x1, y1 = verts[:, :, 0], verts[:, :, 1]
+        nxt = np.roll(verts, -1, axis=1)
+        for i, p in enumerate(polygons):
+            nxt[i, len(p) - 1] = p[0]  # close each polygon on its real first vertex
+            nxt[i, len(p):] = p[-1]    # padding stays zero-length
+        x2, y2 = nxt[:, :, 0], nxt[:, :, 1]
+
+        px = points[:, 0][:, None, None]
+        py = points[:, 1][:, None, None]
+        straddles = (y1 > py) != (y2 > py)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            cross_x = (x2 - x1) * (py - y1) / (y2 - y1) + x1
+        crossings = np.count_nonzero(straddles & (px < cross_x), axis=2)
+        return crossings % 2 == 1
+
+    # ---------- counting ----------
+    def zone_counts(self, detections, shape, classes=("person",)):
+        """{zone name: {class name: count}} for the rules engine."""
+        counts = {name: {} for name in self.names}
+        if not len(detections) or not len(self):
+            return counts
+        inside = self.contains(footpoints(detections.xyxy), shape)
+        for class_name in classes:
+            per_zone = inside[detections.mask(class_name)].sum(axis=0)
+            for name, n in zip(self.names, per_zone.tolist()):
+                counts[name][class_name] = n
+        return counts
+
+    # ---------- cropping ----------
+    def union_box(self, shape, margin=16):
+        """Pixel box (x1, y1, x2, y2) around all zones, plus a margin."""
+        h, w = shape[:2]
+        points = np.vstack(self.polygons(shape))
+        x1, y1 = np.floor(points.min(axis=0)).astype(int) - margin
+        x2, y2 = np.ceil(points.max(axis=0)).astype(int) + margin
+        return max(x1, 0), max(y1, 0), min(x2, w), min(y2, h)
+
+    def crop(self, image, margin=64):
+        """The part of the image covered by zones, and its (x, y) offset.
+
+        People standing in a zone can stick out above it, so a margin is
+        kept. Every entry point detects on this crop when zones are set.
+        """
+        x1, y1, x2, y2 = self.union_box(image.shape, margin)
+        return image[y1:y2, x1:x2], (x1, y1)
+
+    def detect(self, model, image, margin=64, **kwargs):
+        """Run the model only on the part of the image covered by zones.
+
+        Boxes are shifted back into full-image coordinates.
+        """
+        crop, offset = self.crop(image, margin)
+        result = model(crop, verbose=False, **kwargs)[0]
+        return result, shift_boxes(Detections.from_result(result), offset)
+
+
+def shift_boxes(detections, offset):
+    """Move boxes found in a crop back into full-image coordinates."""
+    x, y = offset
+    detections.xyxy = detections.xyxy + np.array([x, y, x, y], dtype=np.float32)
+    return detections
+
+
+# ============================================================
+# 📄 LOADING
+# ============================================================
+_loaded = {}
+
+
+def load_zones(camera="default", path=None):
+    """ZoneSet for a camera, or None if no zones are configured."""
+    path = path or os.getenv(ZONES_ENV) or DEFAULT_ZONES_PATH
+    if path not in _loaded:
+        if not os.path.exists(path):
+            _loaded[path] = {}
+        else:
+            with open(path, encoding="utf-8") as f:
+                config = json.load(f)
+            _loaded[path] = {cam: ZoneSet(zones) for cam, zones in config.items()}
+    return _loaded[path].get(camera)